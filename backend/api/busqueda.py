@@ -0,0 +1,128 @@
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q, TextField
+from django.db.models.functions import Cast, Upper
+
+# Búsqueda de usuarios por nombre, ordenada por similitud de trigramas.
+#
+# En Postgres se usa pg_trgm: el índice GIN sobre UPPER(username::text) de la migración
+# 0023_busqueda_usuarios sirve tanto al LIKE '%q%' como al operador de similitud %, y
+# TrigramSimilarity da el orden. En otras bases de datos (SQLite en local) se usa un índice
+# invertido de trigramas en memoria con la misma definición de trigrama y de similitud que
+# pg_trgm, que las señales de CustomUser mantienen al día en este proceso y que se reconstruye
+# cada BUSQUEDA_TTL segundos para recoger los cambios de otros procesos.
+UMBRAL_SIMILITUD = 0.3
+
+
+def trigramas(texto):
+    # Como pg_trgm: minúsculas, palabras alfanuméricas, dos espacios delante y uno detrás
+    resultado = set()
+    for palabra in re.findall(r"[^\W_]+", texto.lower()):
+        palabra = f"  {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+def similitud(a, b):
+    ta, tb = trigramas(a), trigramas(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class IndiceUsuarios:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nombres = {}
+        self._por_trigrama = defaultdict(set)
+        self._construido = 0
+
+    def _construir(self):
+        nombres = dict(get_user_model().objects.values_list("id", "username"))
+        por_trigrama = defaultdict(set)
+        for id_, nombre in nombres.items():
+            for trigrama in trigramas(nombre):
+                por_trigrama[trigrama].add(id_)
+        self._nombres, self._por_trigrama = nombres, por_trigrama
+        self._construido = time.monotonic()
+
+    def _preparar(self):
+        caducado = time.monotonic() - self._construido > getattr(settings, "BUSQUEDA_TTL", 300)
+        if self._construido and not caducado:
+            return
+        with self._lock:
+            if not self._construido or time.monotonic() - self._construido > getattr(settings, "BUSQUEDA_TTL", 300):
+                self._construir()
+
+    def actualizar(self, id_, nombre=None):
+        # nombre=None para quitar al usuario del índice
+        with self._lock:
+            if not self._construido:
+                return
+            anterior = self._nombres.pop(id_, None)
+            if anterior is not None:
+                for trigrama in trigramas(anterior):
+                    self._por_trigrama[trigrama].discard(id_)
+            if nombre is not None:
+                self._nombres[id_] = nombre
+                for trigrama in trigramas(nombre):
+                    self._por_trigrama[trigrama].add(id_)
+
+    def buscar(self, texto):
+        self._preparar()
+        texto_min = texto.lower()
+        with self._lock:
+            # Candidatos por similitud: comparten algún trigrama con el texto
+            candidatos = set()
+            for trigrama in trigramas(texto):
+                candidatos |= self._por_trigrama.get(trigrama, set())
+            # Candidatos por subcadena: contienen todos los trigramas internos del texto; si el
+            # texto es corto o tiene separadores se miran todos los nombres
+            if len(texto_min) >= 3 and texto_min.isalnum():
+                internos = [self._por_trigrama.get(texto_min[i:i + 3], set()) for i in range(len(texto_min) - 2)]
+                candidatos |= set.intersection(*internos)
+            else:
+                candidatos = self._nombres.keys()
+            nombres = {id_: self._nombres[id_] for id_ in candidatos if id_ in self._nombres}
+
+        texto_mayus = texto.upper()
+        resultados = []
+        for id_, nombre in nombres.items():
+            puntuacion = similitud(nombre, texto)
+            if puntuacion >= UMBRAL_SIMILITUD or texto_mayus in nombre.upper():
+                resultados.append((-puntuacion, nombre, id_))
+        resultados.sort()
+        return [id_ for _, _, id_ in resultados]
+
+
+indice = IndiceUsuarios()
+
+
+def _queryset_postgres(texto):
+    texto = texto.upper()
+    return (
+        get_user_model().objects
+        .annotate(nombre=Upper(Cast("username", TextField())))
+        .filter(Q(nombre__contains=texto) | Q(nombre__trigram_similar=texto))
+        .annotate(similitud=TrigramSimilarity("nombre", texto))
+        .order_by(F("similitud").desc(), "username", "id")
+    )
+
+
+def buscar_usuarios(texto, excluir_id, pagina=1, tamano=10):
+    # Devuelve la página pedida de usuarios ordenados por similitud con texto
+    inicio = (pagina - 1) * tamano
+    if connection.vendor == "postgresql":
+        return list(_queryset_postgres(texto).exclude(id=excluir_id)[inicio:inicio + tamano])
+
+    ids = [id_ for id_ in indice.buscar(texto) if id_ != excluir_id][inicio:inicio + tamano]
+    usuarios = get_user_model().objects.in_bulk(ids)
+    return [usuarios[id_] for id_ in ids if id_ in usuarios]
@@ -0,0 +1,61 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CacheRespuestas:
+    # Datos ya serializados del detalle de viajes y viajes compartidos. Vive en el backend de
+    # caché de Django indicado en CACHE_RESPUESTAS_ALIAS y se invalida desde api/signals.py.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[getattr(settings, "CACHE_RESPUESTAS_ALIAS", "default")]
+
+    def obtener(self, clave, construir, version=None):
+        # Con version, una entrada guardada para otra versión cuenta como fallo: así no se sirve
+        # algo que se escribió justo mientras otra petición invalidaba la clave.
+        entrada = self.backend.get(clave)
+        if entrada is not None and entrada[0] == version:
+            self._contar(hit=True)
+            return entrada[1]
+
+        self._contar(hit=False)
+        datos = construir()
+        self.backend.set(clave, (version, datos), getattr(settings, "CACHE_RESPUESTAS_TIMEOUT", 600))
+        return datos
+
+    def invalidar(self, *claves):
+        self.backend.delete_many(claves)
+
+    def _contar(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+respuestas = CacheRespuestas()
+
+
+def clave_viaje(viaje_id):
+    return f"respuesta:viaje:{viaje_id}"
+
+
+def clave_compartido(compartido_id):
+    return f"respuesta:compartido:{compartido_id}"
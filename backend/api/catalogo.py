@@ -0,0 +1,131 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F
+
+from . import places
+from .models import Actividad, Hotel
+
+# Búsqueda de texto en el catálogo propio (las actividades y hoteles que ya han añadido los
+# usuarios) antes de ir a Google Places. Si hay al menos CATALOGO_MINIMO resultados locales no
+# se sale a Google; si no, se completan con los de Places sin repetir place_id.
+#
+# En Postgres cada fila tiene una columna tsvector "busqueda" (nombre con peso A, dirección B,
+# descripción C) con índice GIN, de la migración 0025_busqueda_lugares. En SQLite hay una
+# tabla FTS5 por modelo cuyo rowid es el id de la fila. Las dos se actualizan desde las señales
+# al guardar o borrar; recalcular_busqueda las rehace si se ha escrito con update()/bulk_*.
+#
+# Solo se devuelven lugares con google_place_id: al añadirlos a un viaje se reutiliza la fila
+# existente en vez de crear otra.
+CONFIG = "spanish"
+CAMPOS = ("nombre", "direccion", "descripcion")
+FOTO = {Actividad: "url_imagen", Hotel: "imagen"}
+
+
+def vector():
+    return (
+        SearchVector("nombre", weight="A", config=CONFIG)
+        + SearchVector("direccion", weight="B", config=CONFIG)
+        + SearchVector("descripcion", weight="C", config=CONFIG)
+    )
+
+
+def tabla_fts(modelo):
+    return f"{modelo._meta.db_table}_fts"
+
+
+def actualizar(modelo, ids):
+    # Vuelve a indexar esas filas; las que ya no existen salen del índice
+    ids = list(ids)
+    if not ids:
+        return
+    if connection.vendor == "postgresql":
+        modelo.objects.filter(pk__in=ids).update(busqueda=vector())
+    elif connection.vendor == "sqlite":
+        tabla = tabla_fts(modelo)
+        filas = list(modelo.objects.filter(pk__in=ids).values_list("id", *CAMPOS))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {tabla} WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids)
+            cursor.executemany(f"INSERT INTO {tabla} (rowid, nombre, direccion, descripcion) VALUES (%s, %s, %s, %s)", filas)
+
+
+def _filas(modelo, texto, limite):
+    columnas = ("nombre", "direccion", "latitud", "longitud", FOTO[modelo], "google_place_id")
+    if connection.vendor == "postgresql":
+        consulta = SearchQuery(texto, config=CONFIG, search_type="websearch")
+        return list(
+            modelo.objects.filter(busqueda=consulta, google_place_id__isnull=False)
+            .annotate(rango=SearchRank(F("busqueda"), consulta))
+            .order_by("-rango", "id")
+            .values(*columnas)[:limite]
+        )
+
+    if connection.vendor != "sqlite":
+        return []
+    # Cada palabra entre comillas para que FTS5 no interprete operadores del usuario
+    terminos = re.findall(r"\w+", texto)
+    if not terminos:
+        return []
+    tabla, base = tabla_fts(modelo), modelo._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {tabla}.rowid FROM {tabla} JOIN {base} ON {base}.id = {tabla}.rowid "
+            f"WHERE {tabla} MATCH %s AND {base}.google_place_id IS NOT NULL "
+            f"ORDER BY bm25({tabla}, 10.0, 4.0, 1.0), {tabla}.rowid LIMIT %s",
+            [" ".join(f'"{t}"' for t in terminos), limite],
+        )
+        ids = [fila[0] for fila in cursor.fetchall()]
+    filas = {f["id"]: f for f in modelo.objects.filter(pk__in=ids).values("id", *columnas)}
+    return [filas[id_] for id_ in ids if id_ in filas]
+
+
+def buscar(modelo, texto):
+    # Mismo formato que los resultados de Google Places (api/places.py)
+    return [{
+        "nombre": fila["nombre"],
+        "direccion": fila["direccion"],
+        "latitud": fila["latitud"],
+        "longitud": fila["longitud"],
+        "foto": fila[FOTO[modelo]] or None,
+        "place_id": fila["google_place_id"],
+    } for fila in _filas(modelo, texto, getattr(settings, "CATALOGO_LIMITE", 20))]
+
+
+def _suficientes(locales):
+    return len(locales) >= getattr(settings, "CATALOGO_MINIMO", 5)
+
+
+def _combinar(locales, remotos):
+    vistos = {lugar["place_id"] for lugar in locales}
+    nuevos = [lugar for lugar in remotos if lugar["place_id"] not in vistos]
+    return (locales + nuevos)[:getattr(settings, "CATALOGO_LIMITE", 20)]
+
+
+def buscar_lugares(modelo, texto):
+    locales = buscar(modelo, texto)
+    if _suficientes(locales):
+        return locales
+    try:
+        remotos = places.lugares.buscar(texto, "es")
+    except Exception:
+        # Si Google falla pero hay algo en local, mejor eso que un error
+        if locales:
+            return locales
+        raise
+    return _combinar(locales, remotos)
+
+
+async def abuscar_lugares(modelo, texto):
+    locales = await sync_to_async(buscar)(modelo, texto)
+    if _suficientes(locales):
+        return locales
+    try:
+        remotos = await places.lugares.abuscar(texto, "es")
+    except Exception:
+        if locales:
+            return locales
+        raise
+    return _combinar(locales, remotos)
@@ -0,0 +1,155 @@
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from scipy.spatial import cKDTree
+
+from .models import Actividad, Hotel
+
+# Búsqueda de lugares cercanos (k vecinos dentro de un radio) sobre todo el catálogo de
+# actividades y hoteles, con un k-d tree en memoria en vez de recorrer la tabla con haversine.
+# Los puntos se guardan como vectores unitarios en 3D: la distancia euclídea (cuerda) crece
+# igual que la distancia sobre la esfera, así que el árbol sirve tal cual y no falla cerca
+# del antimeridiano ni de los polos.
+#
+# Los lugares nuevos van a un buffer pequeño que se recorre por fuerza bruta junto al árbol;
+# el árbol se reconstruye cuando el buffer crece demasiado o cada CERCANOS_TTL segundos (así
+# se recogen ediciones y borrados). Cada CERCANOS_REFRESCO segundos se traen al buffer las
+# filas creadas por otros procesos.
+#
+# Los borrados hasta la siguiente reconstrucción se marcan como retirados: la consulta al árbol
+# pide k más el número de retirados y los descarta después, así que siguen saliendo k resultados.
+RADIO_TIERRA = 6371008.8
+TIPOS = ("actividad", "hotel")
+MODELOS = (Actividad, Hotel)
+BUFFER_MAX = 2000
+
+
+def _vectores(lat, lng):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lng = np.radians(np.asarray(lng, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+
+def _cuerda(metros):
+    return 2 * math.sin(min(metros / RADIO_TIERRA, math.pi) / 2)
+
+
+def _metros(cuerda):
+    return 2 * RADIO_TIERRA * math.asin(min(cuerda / 2, 1))
+
+
+class IndiceCercanos:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (árbol, ids, tipos, buffer, retirados): se sustituye entero para que las búsquedas que
+        # están en marcha sin el lock vean siempre un estado coherente
+        self._estado = (None, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8), {}, frozenset())
+        self._ultimo_id = [0] * len(MODELOS)
+        self._construido = 0
+        self._sincronizado = 0
+
+    def _filas(self, tipo, desde=0):
+        return list(
+            MODELOS[tipo].objects.filter(id__gt=desde, latitud__isnull=False, longitud__isnull=False)
+            .order_by("id").values_list("id", "latitud", "longitud")
+        )
+
+    def _construir(self):
+        ids, tipos, lat, lng = [], [], [], []
+        for tipo in range(len(MODELOS)):
+            filas = self._filas(tipo)
+            for id_, la, ln in filas:
+                ids.append(id_)
+                lat.append(la)
+                lng.append(ln)
+            tipos.extend([tipo] * len(filas))
+            self._ultimo_id[tipo] = filas[-1][0] if filas else 0
+
+        arbol = cKDTree(_vectores(lat, lng), balanced_tree=False, compact_nodes=False) if ids else None
+        self._estado = (arbol, np.array(ids, dtype=np.int64), np.array(tipos, dtype=np.int8), {}, frozenset())
+        self._construido = self._sincronizado = time.monotonic()
+
+    def _sincronizar(self):
+        arbol, ids, tipos, buffer, retirados = self._estado
+        buffer = dict(buffer)
+        for tipo in range(len(MODELOS)):
+            for id_, la, ln in self._filas(tipo, self._ultimo_id[tipo]):
+                buffer[(tipo, id_)] = _vectores([la], [ln])[0]
+                self._ultimo_id[tipo] = id_
+        self._estado = (arbol, ids, tipos, buffer, retirados)
+        self._sincronizado = time.monotonic()
+
+    def _pendiente(self):
+        ahora = time.monotonic()
+        if not self._construido or len(self._estado[3]) + len(self._estado[4]) > BUFFER_MAX \
+                or ahora - self._construido > getattr(settings, "CERCANOS_TTL", 3600):
+            return self._construir
+        if ahora - self._sincronizado > getattr(settings, "CERCANOS_REFRESCO", 60):
+            return self._sincronizar
+        return None
+
+    def _preparar(self):
+        if self._pendiente() is None:
+            return
+        with self._lock:
+            tarea = self._pendiente()
+            if tarea is not None:
+                tarea()
+
+    def añadir(self, tipo, id_, latitud, longitud):
+        # Se llama al crear un lugar en este proceso para que aparezca sin esperar al refresco
+        tipo = TIPOS.index(tipo)
+        try:
+            vector = _vectores([float(latitud)], [float(longitud)])[0]
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            if self._construido and id_ > self._ultimo_id[tipo]:
+                arbol, ids, tipos, buffer, retirados = self._estado
+                self._estado = (arbol, ids, tipos, {**buffer, (tipo, id_): vector}, retirados)
+
+    def retirar(self, tipo, id_):
+        # Lugar borrado: sale del buffer o queda marcado hasta que se reconstruya el árbol
+        clave = (TIPOS.index(tipo), id_)
+        with self._lock:
+            arbol, ids, tipos, buffer, retirados = self._estado
+            if clave in buffer:
+                buffer = {c: v for c, v in buffer.items() if c != clave}
+            else:
+                retirados = retirados | {clave}
+            self._estado = (arbol, ids, tipos, buffer, retirados)
+
+    def buscar(self, latitud, longitud, k=10, radio=1000):
+        self._preparar()
+        arbol, ids, tipos, buffer, retirados = self._estado
+        punto = _vectores([latitud], [longitud])[0]
+        limite = _cuerda(radio)
+
+        candidatos = []
+        if arbol is not None:
+            n = min(k + len(retirados), len(ids))
+            distancias, posiciones = arbol.query(punto, k=n, distance_upper_bound=limite)
+            distancias, posiciones = np.atleast_1d(distancias), np.atleast_1d(posiciones)
+            validos = np.isfinite(distancias)
+            candidatos = [
+                (d, tipo, id_)
+                for d, tipo, id_ in zip(distancias[validos], tipos[posiciones[validos]], ids[posiciones[validos]])
+                if (tipo, id_) not in retirados
+            ]
+        if buffer:
+            claves = list(buffer)
+            distancias = np.linalg.norm(np.array(list(buffer.values())) - punto, axis=1)
+            candidatos += [(d, *claves[i]) for i, d in enumerate(distancias) if d <= limite]
+
+        candidatos.sort(key=lambda c: c[0])
+        return [
+            {"id": int(id_), "tipo": TIPOS[tipo], "distancia": round(_metros(float(d)))}
+            for d, tipo, id_ in candidatos[:k]
+        ]
+
+
+indice = IndiceCercanos()
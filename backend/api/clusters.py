@@ -0,0 +1,209 @@
+import math
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg, Count, F, Min
+from django.db.models.functions import Floor, Ln, Radians, Tan
+
+from . import cache, condicional, geo
+from .models import Actividad, ActividadEnViaje, EstanciaHotel, Hotel, Viaje
+
+# Agrupación de puntos del mapa en el servidor. Se trabaja con las teselas de 256 px de los
+# mapas web (Web Mercator): cada tesela se divide en una rejilla de PIXELES_CLUSTER px y los
+# puntos que caen en la misma casilla forman un cluster (centroide, número de puntos y el lugar
+# de id más bajo como representante). Como mucho salen (256 / 64)² = 16 clusters por
+# tesela, así que la respuesta está acotada por el número de teselas y no por el de puntos.
+#
+# La agrupación se hace en la base de datos: GROUP BY por casilla (la proyección de Mercator se
+# calcula en SQL), así que llegan como mucho 16 filas por tesela y tipo aunque con zoom bajo el
+# rectángulo cubra el catálogo entero.
+#
+# Cada tesela de cada zoom tiene su versión en la caché; al crear, mover o borrar un lugar solo
+# cambia la de las teselas que lo contienen (ver api/signals.py), y lo guardado con la versión
+# anterior deja de leerse.
+TAMANO_TESELA = 256
+PIXELES_CLUSTER = 64
+POR_LADO = TAMANO_TESELA // PIXELES_CLUSTER
+LAT_MAX = 85.05112878
+ZOOM_MAX = 20
+
+TIPOS = ("actividad", "hotel")
+
+
+def _x(lng, zoom):
+    return (np.asarray(lng, dtype=float) + 180) / 360 * 2 ** zoom
+
+
+def _y(lat, zoom):
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -LAT_MAX, LAT_MAX))
+    return (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / math.pi) / 2 * 2 ** zoom
+
+
+def _lat_tesela(y, zoom):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / 2 ** zoom))))
+
+
+def teselas(min_lat, max_lat, min_lng, max_lng, zoom):
+    n = 2 ** zoom
+    x_ini, x_fin = (min(int(_x(lng, zoom)), n - 1) for lng in (min_lng, max_lng))
+    y_ini, y_fin = (min(int(_y(lat, zoom)), n - 1) for lat in (max_lat, min_lat))
+    if min_lng <= max_lng:
+        columnas = list(range(x_ini, x_fin + 1))
+    else:
+        columnas = list(dict.fromkeys([*range(x_ini, n), *range(0, x_fin + 1)]))
+    return [(x, y) for x in columnas for y in range(y_ini, y_fin + 1)]
+
+
+def tesela_de(lat, lng, zoom):
+    n = 2 ** zoom
+    return min(int(_x(lng, zoom)), n - 1), min(int(_y(lat, zoom)), n - 1)
+
+
+def _clave_version(zoom, tesela):
+    return f"clusters:version:{zoom}:{tesela[0]}:{tesela[1]}"
+
+
+def _versiones(backend, zoom, lista):
+    # Una versión nueva nunca coincide con una anterior, así que si la clave caduca o se
+    # expulsa basta con crear otra: lo guardado antes simplemente deja de leerse
+    claves = {tesela: _clave_version(zoom, tesela) for tesela in lista}
+    versiones = backend.get_many(claves.values())
+    nuevas = {clave: time.time_ns() for clave in claves.values() if clave not in versiones}
+    if nuevas:
+        backend.set_many(nuevas, getattr(settings, "CLUSTERS_TIMEOUT", 3600))
+        versiones.update(nuevas)
+    return {tesela: versiones[claves[tesela]] for tesela in lista}
+
+
+def invalidar(posiciones):
+    # Nueva versión de la tesela que contiene cada posición (lat, lng), en todos los zooms
+    nuevas = {}
+    for lat, lng in posiciones:
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            continue
+        for zoom in range(ZOOM_MAX + 1):
+            nuevas[_clave_version(zoom, tesela_de(lat, lng, zoom))] = time.time_ns()
+    if nuevas:
+        cache.respuestas.backend.set_many(nuevas, getattr(settings, "CLUSTERS_TIMEOUT", 3600))
+
+
+def _agregados(lugares, zoom):
+    # Misma casilla que _agrupar: columnas y filas de PIXELES_CLUSTER px en coordenadas de Mercator
+    escala = 2 ** zoom * POR_LADO
+    mercator = Ln(Tan(Radians(F("latitud") / 2 + 45)))
+    return (
+        lugares.order_by()
+        .annotate(
+            columna=Floor((F("longitud") + 180) / 360 * escala),
+            fila=Floor((1 - mercator / math.pi) / 2 * escala),
+        )
+        .values("fila", "columna")
+        .annotate(representante=Min("id"), lat=Avg("latitud"), lng=Avg("longitud"), total=Count("id"))
+        .values_list("representante", "lat", "lng", "total")
+    )
+
+
+def _puntos(ambito, usuario, rectangulo, zoom):
+    filtro = geo.filtro_viewport(*rectangulo)
+    actividades = Actividad.objects.filter(filtro)
+    hoteles = Hotel.objects.filter(filtro)
+    if ambito != "catalogo":
+        actividades = actividades.filter(
+            id__in=ActividadEnViaje.objects.filter(viaje__usuario=usuario).values("actividad_id")
+        )
+        hoteles = hoteles.filter(id__in=EstanciaHotel.objects.filter(viaje__usuario=usuario).values("hotel_id"))
+
+    filas = [
+        (tipo, *fila) for tipo, lugares in enumerate((actividades, hoteles)) for fila in _agregados(lugares, zoom)
+    ]
+    if not filas:
+        return np.empty((0, 5))
+    return np.array(filas, dtype=float)
+
+
+def _agrupar(puntos, zoom, pendientes):
+    # Cada fila ya es una casilla (una por tipo): aquí se juntan actividades y hoteles, todo
+    # vectorizado con np.unique para los grupos y bincount para los centroides ponderados
+    n = 2 ** zoom
+    por_tesela = {tesela: [] for tesela in pendientes}
+    puntos = puntos[np.abs(puntos[:, 2]) <= LAT_MAX]
+    if not len(puntos):
+        return por_tesela
+
+    tipo, ids, lat, lng, peso = puntos.T
+    px, py = _x(lng, zoom), _y(lat, zoom)
+    tx = np.clip(np.floor(px), 0, n - 1).astype(np.int64)
+    ty = np.clip(np.floor(py), 0, n - 1).astype(np.int64)
+    cx = np.clip(np.floor((px - tx) * POR_LADO), 0, POR_LADO - 1).astype(np.int64)
+    cy = np.clip(np.floor((py - ty) * POR_LADO), 0, POR_LADO - 1).astype(np.int64)
+    casilla = ((ty * n + tx) * POR_LADO + cy) * POR_LADO + cx
+
+    grupos, inverso = np.unique(casilla, return_inverse=True)
+    cuenta = np.bincount(inverso, weights=peso)
+    lat_c = np.bincount(inverso, weights=lat * peso) / cuenta
+    lng_c = np.bincount(inverso, weights=lng * peso) / cuenta
+
+    # Representante: el de la fila con más lugares de la casilla
+    orden = np.lexsort((-peso, inverso))
+    representante = orden[np.r_[0, np.flatnonzero(np.diff(inverso[orden])) + 1]]
+
+    tesela = grupos // (POR_LADO * POR_LADO)
+    for i in range(len(grupos)):
+        clave = (int(tesela[i] % n), int(tesela[i] // n))
+        if clave in por_tesela:
+            r = representante[i]
+            por_tesela[clave].append(
+                (round(float(lat_c[i]), 6), round(float(lng_c[i]), 6), int(cuenta[i]), int(ids[r]), TIPOS[int(tipo[r])])
+            )
+    return por_tesela
+
+
+def _clave(prefijo, zoom, tesela, version):
+    return f"{prefijo}:{zoom}:{tesela[0]}:{tesela[1]}:{version}"
+
+
+def clusters(min_lat, max_lat, min_lng, max_lng, zoom, ambito="catalogo", usuario=None):
+    lista = teselas(min_lat, max_lat, min_lng, max_lng, zoom)
+    if len(lista) > getattr(settings, "CLUSTERS_MAX_TESELAS", 64):
+        raise ValueError("demasiadas teselas para este zoom")
+
+    prefijo = f"clusters:{ambito}"
+    if ambito != "catalogo":
+        # Cualquier cambio en los viajes del usuario sube su versión y cambia la clave
+        versiones = Viaje.objects.filter(usuario=usuario).order_by("id").values_list("id", "version")
+        huella = condicional.etag_de(list(versiones)).strip('"')
+        prefijo += f":{usuario.pk}:{huella}"
+
+    backend = cache.respuestas.backend
+    versiones_teselas = _versiones(backend, zoom, lista)
+    claves = {tesela: _clave(prefijo, zoom, tesela, versiones_teselas[tesela]) for tesela in lista}
+    guardadas = backend.get_many(claves.values())
+    pendientes = [tesela for tesela in lista if claves[tesela] not in guardadas]
+
+    if pendientes:
+        # Una sola consulta para el rectángulo alineado a teselas de todo lo que falta. Las
+        # columnas van en el orden de la lista (de oeste a este, también cruzando el antimeridiano).
+        n = 2 ** zoom
+        columnas = list(dict.fromkeys(x for x, _ in pendientes))
+        filas = [y for _, y in pendientes]
+        if len(columnas) == n:
+            oeste, este = -180, 180
+        else:
+            oeste, este = columnas[0] / n * 360 - 180, (columnas[-1] + 1) / n * 360 - 180
+        rectangulo = (_lat_tesela(max(filas) + 1, zoom), _lat_tesela(min(filas), zoom), oeste, este)
+        nuevas = _agrupar(_puntos(ambito, usuario, rectangulo, zoom), zoom, pendientes)
+        backend.set_many(
+            {claves[tesela]: datos for tesela, datos in nuevas.items()},
+            getattr(settings, "CLUSTERS_TIMEOUT", 3600),
+        )
+        guardadas.update({claves[tesela]: datos for tesela, datos in nuevas.items()})
+
+    columnas = {"lat": [], "lng": [], "count": [], "id": [], "tipo": []}
+    for tesela in lista:
+        for cluster in guardadas[claves[tesela]]:
+            for columna, valor in zip(columnas.values(), cluster):
+                columna.append(valor)
+    return columnas
@@ -0,0 +1,32 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def etag_de(*partes):
+    crudo = "|".join(str(p) for p in partes)
+    return quote_etag(hashlib.md5(crudo.encode("utf-8")).hexdigest())
+
+
+def variante(request):
+    # fields/expand/ordering... cambian la representación, así que forman parte del ETag
+    return sorted(request.query_params.lists())
+
+
+def no_modificado(request, etag, ultima_modificacion=None):
+    # Devuelve un 304 (o 412) si el cliente ya tiene esta versión, o None si hay que responder
+    timestamp = int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+    respuesta = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if respuesta is not None:
+        respuesta = con_validadores(respuesta, etag, ultima_modificacion)
+    return respuesta
+
+
+def con_validadores(respuesta, etag, ultima_modificacion=None):
+    respuesta["ETag"] = etag
+    if ultima_modificacion:
+        respuesta["Last-Modified"] = http_date(ultima_modificacion.timestamp())
+    # Que el cliente revalide siempre en vez de reutilizar la copia sin preguntar
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Relacion
+
+# seguidores_count / siguiendo_count de CustomUser: solo cuentan relaciones aceptadas.
+# Se actualizan con F() en la misma transacción que cambia la relación; lo que se escape
+# (borrados desde el admin, cascadas...) lo arregla reconciliar_contadores.
+
+
+def _sumar(relacion, delta):
+    User = get_user_model()
+    User.objects.filter(pk=relacion.seguidor_id).update(siguiendo_count=Greatest(F("siguiendo_count") + delta, 0))
+    User.objects.filter(pk=relacion.seguido_id).update(seguidores_count=Greatest(F("seguidores_count") + delta, 0))
+
+
+def relacion_aceptada(relacion):
+    _sumar(relacion, 1)
+
+
+def relacion_borrada(relacion):
+    if relacion.estado == "aceptada":
+        _sumar(relacion, -1)
+
+
+def _total(campo):
+    return Coalesce(
+        Subquery(
+            Relacion.objects.filter(**{campo: OuterRef("pk")}, estado="aceptada")
+            .values(campo)
+            .annotate(total=Count("id"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def desajustados():
+    # Usuarios cuyos contadores no coinciden con las relaciones aceptadas reales
+    return (
+        get_user_model().objects
+        .annotate(seguidores_real=_total("seguido"), siguiendo_real=_total("seguidor"))
+        .exclude(seguidores_count=F("seguidores_real"), siguiendo_count=F("siguiendo_real"))
+    )
+
+
+def reconciliar():
+    # Un único UPDATE con subconsultas correlacionadas sobre las filas desajustadas
+    return get_user_model().objects.filter(pk__in=desajustados().values("pk")).update(
+        seguidores_count=_total("seguido"), siguiendo_count=_total("seguidor"),
+    )
@@ -0,0 +1,78 @@
+import math
+
+from django.db.models import Q
+
+# Índice espacial sin PostGIS: el mundo se divide en una rejilla fija de CELDA_GRADOS grados y
+# cada Actividad/Hotel guarda el número de su celda (fila * COLUMNAS + columna). Como las
+# celdas de una misma fila son consecutivas, un rectángulo del mapa se traduce en unos pocos
+# rangos BETWEEN sobre el índice (celda, latitud, longitud), en Postgres y en SQLite.
+# Cambiar CELDA_GRADOS obliga a ejecutar recalcular_celdas.
+CELDA_GRADOS = 0.1
+COLUMNAS = round(360 / CELDA_GRADOS)
+FILAS = round(180 / CELDA_GRADOS)
+
+# Por encima de estas filas se usa un único rango que cubre toda la franja de latitudes
+MAX_FILAS_VIEWPORT = 64
+
+
+def _fila(lat):
+    return min(max(math.floor((lat + 90) / CELDA_GRADOS), 0), FILAS - 1)
+
+
+def _columna(lng):
+    return math.floor((lng + 180) / CELDA_GRADOS) % COLUMNAS
+
+
+def celda(lat, lng):
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    return _fila(lat) * COLUMNAS + _columna(lng)
+
+
+def rangos_celdas(min_lat, max_lat, min_lng, max_lng):
+    fila_ini, fila_fin = _fila(min_lat), _fila(max_lat)
+    if fila_fin - fila_ini + 1 > MAX_FILAS_VIEWPORT:
+        return [(fila_ini * COLUMNAS, fila_fin * COLUMNAS + COLUMNAS - 1)]
+
+    col_ini, col_fin = _columna(min_lng), _columna(max_lng)
+    if min_lng <= max_lng and max_lng - min_lng >= 360 - CELDA_GRADOS:
+        columnas = [(0, COLUMNAS - 1)]
+    elif col_ini <= col_fin and min_lng <= max_lng:
+        columnas = [(col_ini, col_fin)]
+    else:
+        # El rectángulo cruza el antimeridiano
+        columnas = [(0, col_fin), (col_ini, COLUMNAS - 1)]
+
+    rangos = []
+    for fila in range(fila_ini, fila_fin + 1):
+        for ini, fin in columnas:
+            ini, fin = fila * COLUMNAS + ini, fila * COLUMNAS + fin
+            if rangos and rangos[-1][1] + 1 == ini:
+                rangos[-1] = (rangos[-1][0], fin)
+            else:
+                rangos.append((ini, fin))
+    return rangos
+
+
+def filtro_viewport(min_lat, max_lat, min_lng, max_lng, prefijo=""):
+    # Rangos de celdas para usar el índice + filtro exacto por coordenadas en el borde.
+    # prefijo permite filtrar a través de una relación (p. ej. "actividad__").
+    celdas = Q()
+    for ini, fin in rangos_celdas(min_lat, max_lat, min_lng, max_lng):
+        celdas |= Q(**{f"{prefijo}celda__range": (ini, fin)})
+
+    filtro = celdas & Q(**{f"{prefijo}latitud__gte": min_lat, f"{prefijo}latitud__lte": max_lat})
+    if min_lng <= max_lng:
+        return filtro & Q(**{f"{prefijo}longitud__gte": min_lng, f"{prefijo}longitud__lte": max_lng})
+    return filtro & (Q(**{f"{prefijo}longitud__gte": min_lng}) | Q(**{f"{prefijo}longitud__lte": max_lng}))
+
+
+def parametros_viewport(params):
+    # Lanza ValueError si falta algún borde o no es un número válido
+    valores = [float(params[clave]) for clave in ("min_lat", "max_lat", "min_lng", "max_lng")]
+    min_lat, max_lat, min_lng, max_lng = valores
+    if not (-90 <= min_lat <= max_lat <= 90) or not all(-180 <= v <= 180 for v in (min_lng, max_lng)):
+        raise ValueError("viewport fuera de rango")
+    return min_lat, max_lat, min_lng, max_lng
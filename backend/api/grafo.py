@@ -0,0 +1,172 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+
+from . import cache
+from .models import Relacion
+
+# Caché del grafo de seguimiento para las preguntas "¿le sigo?" / "¿me sigue?" sin ir a Relacion.
+# Por usuario se guardan los ids de a quién sigue y de quién le sigue (con o sin aceptar) en
+# arrays de enteros ordenados, y se busca con bisect.
+#
+# Hay dos niveles: un LRU en memoria del proceso y el backend de caché de Django, compartido
+# entre workers si es Redis/Memcached. Cada usuario tiene un contador de versión en la caché de
+# Django que las señales de Relacion suben al confirmar la transacción; las entradas se guardan
+# por (usuario, versión), así que nunca hay que borrarlas: basta con que cambie la versión.
+#
+# Con una caché por proceso (LocMemCache, la de por defecto) el incr de un worker no llega a los
+# demás; en ese caso la versión caduca a los GRAFO_TTL_LOCAL segundos y cada worker vuelve a
+# leer Relacion como mucho con ese retraso. check --deploy avisa de ello.
+ESTADOS = ("pendiente", "aceptada")
+
+
+def compartida(backend):
+    return not isinstance(backend, (LocMemCache, DummyCache))
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def comprobar_cache(app_configs, **kwargs):
+    if compartida(cache.respuestas.backend):
+        return []
+    return [checks.Warning(
+        "La caché de respuestas es local a cada proceso.",
+        hint="Con varios workers usa Redis o Memcached: si no, el grafo de seguimiento de cada "
+             "proceso puede ir hasta GRAFO_TTL_LOCAL segundos por detrás de los cambios.",
+        id="api.W001",
+    )]
+
+
+class Vecinos:
+
+    def __init__(self, salientes, estados_salientes, entrantes, estados_entrantes):
+        self.salientes = salientes
+        self.estados_salientes = estados_salientes
+        self.entrantes = entrantes
+        self.estados_entrantes = estados_entrantes
+
+    @classmethod
+    def desde_relaciones(cls, usuario_id, relaciones):
+        salientes, entrantes = [], []
+        for seguidor_id, seguido_id, estado in relaciones:
+            if seguidor_id == usuario_id:
+                salientes.append((seguido_id, ESTADOS.index(estado)))
+            else:
+                entrantes.append((seguidor_id, ESTADOS.index(estado)))
+        salientes.sort()
+        entrantes.sort()
+        return cls(
+            array("q", (i for i, _ in salientes)), bytes(e for _, e in salientes),
+            array("q", (i for i, _ in entrantes)), bytes(e for _, e in entrantes),
+        )
+
+    def serializar(self):
+        return (self.salientes.tobytes(), self.estados_salientes, self.entrantes.tobytes(), self.estados_entrantes)
+
+    @classmethod
+    def deserializar(cls, datos):
+        salientes, estados_salientes, entrantes, estados_entrantes = datos
+        return cls(array("q", salientes), estados_salientes, array("q", entrantes), estados_entrantes)
+
+    @staticmethod
+    def _buscar(ids, estados, id_):
+        i = bisect_left(ids, id_)
+        if i < len(ids) and ids[i] == id_:
+            return ESTADOS[estados[i]]
+        return None
+
+    def estado_hacia(self, id_):
+        # Estado de la relación usuario -> id_ (None si no hay)
+        return self._buscar(self.salientes, self.estados_salientes, id_)
+
+    def estado_desde(self, id_):
+        return self._buscar(self.entrantes, self.estados_entrantes, id_)
+
+
+class CacheGrafo:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return cache.respuestas.backend
+
+    def _clave_version(self, usuario_id):
+        return f"grafo:version:{usuario_id}"
+
+    def _caducidad(self, timeout):
+        # Sin caché compartida nada avisa a este proceso de los cambios hechos en otro
+        if compartida(self.backend):
+            return timeout
+        local = getattr(settings, "GRAFO_TTL_LOCAL", 30)
+        return local if timeout is None else min(timeout, local)
+
+    def _version(self, usuario_id):
+        clave = self._clave_version(usuario_id)
+        version = self.backend.get(clave)
+        if version is None:
+            # Arranca en un valor que no se haya usado antes por si la clave se perdió o caducó
+            self.backend.add(clave, time.time_ns(), self._caducidad(None))
+            version = self.backend.get(clave)
+        return version
+
+    def vecinos(self, usuario_id):
+        version = self._version(usuario_id)
+        clave = (usuario_id, version)
+        with self._lock:
+            vecinos = self._local.get(clave)
+            if vecinos is not None:
+                self._local.move_to_end(clave)
+                self.hits += 1
+                return vecinos
+            self.misses += 1
+
+        clave_compartida = f"grafo:{usuario_id}:{version}"
+        datos = self.backend.get(clave_compartida)
+        if datos is not None:
+            vecinos = Vecinos.deserializar(datos)
+        else:
+            relaciones = Relacion.objects.filter(
+                Q(seguidor_id=usuario_id) | Q(seguido_id=usuario_id)
+            ).values_list("seguidor_id", "seguido_id", "estado")
+            vecinos = Vecinos.desde_relaciones(usuario_id, relaciones)
+            timeout = self._caducidad(getattr(settings, "GRAFO_TIMEOUT", 3600))
+            self.backend.set(clave_compartida, vecinos.serializar(), timeout)
+
+        with self._lock:
+            self._local[clave] = vecinos
+            self._local.move_to_end(clave)
+            while len(self._local) > getattr(settings, "GRAFO_LRU_MAX", 10000):
+                self._local.popitem(last=False)
+        return vecinos
+
+    def invalidar(self, *usuarios_ids):
+        for usuario_id in usuarios_ids:
+            try:
+                self.backend.incr(self._clave_version(usuario_id))
+            except ValueError:
+                pass
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "usuarios": len(self._local),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+seguimientos = CacheGrafo()
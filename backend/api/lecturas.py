@@ -0,0 +1,176 @@
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .models import ActividadEnViaje, EstanciaHotel, Gasto, Viaje
+
+# Camino rápido de solo lectura para los listados más usados: filas de .values() convertidas
+# a dicts con mapas de campos fijos, sin pasar campo a campo por los ModelSerializer.
+# La salida tiene que ser idéntica a la de ViajeSerializer, GastoSerializer y
+# ViajeCompartidoSerializer (mismas claves, mismo orden, mismo formato), así que cualquier
+# campo nuevo en esos serializers hay que añadirlo también aquí.
+
+
+def _fecha(valor):
+    return valor.isoformat()
+
+
+def _fecha_hora(valor):
+    # Igual que DateTimeField de DRF: zona horaria actual e ISO 8601 con "Z" para UTC
+    valor = valor.astimezone(timezone.get_current_timezone()).isoformat()
+    if valor.endswith("+00:00"):
+        valor = valor[:-6] + "Z"
+    return valor
+
+
+# (clave de salida, columna de .values(), conversión)
+VIAJE = (
+    ("id", "id", None),
+    ("nombre", "nombre", None),
+    ("ciudad", "ciudad", None),
+    ("hotel", "hotel", None),
+    ("fecha_inicio", "fecha_inicio", _fecha),
+    ("fecha_fin", "fecha_fin", _fecha),
+    ("imagen_destacada", "imagen_destacada", None),
+    ("notas", "notas", None),
+)
+
+ACTIVIDAD_EN_VIAJE = (
+    ("relacion_id", "id", None),
+    ("id", "actividad__id", None),
+    ("nombre", "actividad__nombre", None),
+    ("descripcion", "actividad__descripcion", None),
+    ("url_imagen", "actividad__url_imagen", None),
+    ("direccion", "actividad__direccion", None),
+    ("latitud", "actividad__latitud", None),
+    ("longitud", "actividad__longitud", None),
+    ("fecha_realizacion", "fecha_realizacion", _fecha),
+)
+
+ESTANCIA = (
+    ("id", "id", None),
+    ("fecha_inicio", "fecha_inicio", _fecha),
+    ("fecha_fin", "fecha_fin", _fecha),
+)
+
+HOTEL = (
+    ("id", "hotel__id", None),
+    ("nombre", "hotel__nombre", None),
+    ("descripcion", "hotel__descripcion", None),
+    ("direccion", "hotel__direccion", None),
+    ("pais", "hotel__pais", None),
+    ("latitud", "hotel__latitud", float),
+    ("longitud", "hotel__longitud", float),
+    ("imagen", "hotel__imagen", None),
+    ("google_place_id", "hotel__google_place_id", None),
+)
+
+# fields = '__all__' deja las claves foráneas al final
+GASTO = (
+    ("id", "id", None),
+    ("concepto", "concepto", None),
+    ("cantidad", "cantidad", float),
+    ("categoria", "categoria", None),
+    ("fecha", "fecha", _fecha),
+    ("notas", "notas", None),
+    ("viaje", "viaje", None),
+)
+
+COMPARTIDO_COLUMNAS = (
+    "id", "viaje", "snapshot", "comentario", "publicado_por", "fecha_publicacion", "likes_count", "ya_dado_like",
+)
+
+
+def _columnas(*mapas):
+    return [columna for mapa in mapas for _, columna, _ in mapa]
+
+
+def _fila(fila, mapa):
+    datos = {}
+    for clave, columna, conversion in mapa:
+        valor = fila[columna]
+        datos[clave] = conversion(valor) if conversion is not None and valor is not None else valor
+    return datos
+
+
+def _por_viaje(queryset, viaje_ids, construir):
+    agrupado = defaultdict(list)
+    for fila in queryset.filter(viaje_id__in=viaje_ids):
+        agrupado[fila["viaje_id"]].append(construir(fila))
+    return agrupado
+
+
+def viajes(queryset, campos=None):
+    # Equivale a ViajeSerializer(queryset, many=True, campos=campos).data
+    # con una consulta por relación anidada pedida.
+    mapa = [m for m in VIAJE if campos is None or m[0] in campos]
+    relaciones = [r for r in ("actividades", "estancias", "gastos") if campos is None or r in campos]
+
+    filas = list(queryset.values(*{"id", *_columnas(mapa)}))
+    ids = [fila["id"] for fila in filas]
+
+    anidados = {}
+    if "actividades" in relaciones:
+        anidados["actividades"] = _por_viaje(
+            ActividadEnViaje.objects.values("viaje_id", *_columnas(ACTIVIDAD_EN_VIAJE)),
+            ids, lambda fila: _fila(fila, ACTIVIDAD_EN_VIAJE),
+        )
+    if "estancias" in relaciones:
+        def estancia(fila):
+            datos = _fila(fila, ESTANCIA)
+            return {"id": datos["id"], "hotel": _fila(fila, HOTEL),
+                    "fecha_inicio": datos["fecha_inicio"], "fecha_fin": datos["fecha_fin"]}
+        anidados["estancias"] = _por_viaje(
+            EstanciaHotel.objects.values("viaje_id", *_columnas(ESTANCIA, HOTEL)), ids, estancia,
+        )
+    if "gastos" in relaciones:
+        anidados["gastos"] = _por_viaje(
+            Gasto.objects.values("viaje_id", *_columnas(GASTO)), ids, lambda fila: _fila(fila, GASTO),
+        )
+
+    resultado = []
+    for fila in filas:
+        datos = _fila(fila, mapa)
+        for relacion in relaciones:
+            datos[relacion] = anidados[relacion].get(fila["id"], [])
+        resultado.append(datos)
+    return resultado
+
+
+def gastos(queryset):
+    # Equivale a GastoSerializer(queryset, many=True).data
+    return [_fila(fila, GASTO) for fila in queryset.values(*_columnas(GASTO))]
+
+
+def filas_compartidos(queryset, extra=()):
+    # queryset de ViajeCompartido.objects.para_feed(); extra son columnas que necesita el paginador
+    return queryset.values(*COMPARTIDO_COLUMNAS, *extra)
+
+
+def compartidos(filas, campos=None):
+    # Equivale a ViajeCompartidoSerializer(..., many=True).data sobre filas de filas_compartidos()
+    sin_snapshot = [fila["viaje"] for fila in filas if fila["snapshot"] is None]
+    en_vivo = {}
+    if sin_snapshot:
+        con_id = None if campos is None else {"id", *campos}
+        for viaje in viajes(Viaje.objects.filter(pk__in=sin_snapshot), con_id):
+            viaje_id = viaje["id"] if campos is None or "id" in campos else viaje.pop("id")
+            en_vivo[viaje_id] = viaje
+
+    resultado = []
+    for fila in filas:
+        viaje = fila["snapshot"]
+        if viaje is None:
+            viaje = en_vivo[fila["viaje"]]
+        elif campos is not None:
+            viaje = {k: v for k, v in viaje.items() if k in campos}
+        resultado.append({
+            "id": fila["id"],
+            "viaje": viaje,
+            "comentario": fila["comentario"],
+            "publicado_por": fila["publicado_por"],
+            "fecha_publicacion": _fecha_hora(fila["fecha_publicacion"]),
+            "likes_count": fila["likes_count"],
+            "ya_dado_like": fila["ya_dado_like"],
+        })
+    return resultado
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import sugerencias
+
+
+class Command(BaseCommand):
+    help = "Calcula las sugerencias de amigos de amigos de los usuarios cuyas relaciones han cambiado"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--completo", action="store_true", help="Recalcular todos los usuarios")
+        parser.add_argument(
+            "--intervalo", type=int, default=0,
+            help="Segundos entre pasadas; si se indica, el comando se queda corriendo como worker",
+        )
+        parser.add_argument("--lote", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            total = sugerencias.calcular(completo=options["completo"], lote=options["lote"])
+            if total or not options["intervalo"]:
+                self.stdout.write(f"Sugerencias recalculadas para {total} usuarios")
+            if not options["intervalo"]:
+                return
+            time.sleep(options["intervalo"])
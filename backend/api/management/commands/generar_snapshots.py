@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api import snapshot
+from api.models import ViajeCompartido
+
+
+class Command(BaseCommand):
+    help = "Genera el snapshot de los viajes compartidos que aún no lo tienen"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true", help="Regenerar también los que ya tienen snapshot")
+
+    def handle(self, *args, **options):
+        compartidos = ViajeCompartido.objects.order_by("id")
+        if not options["todos"]:
+            compartidos = compartidos.filter(snapshot__isnull=True)
+
+        total = 0
+        for viaje_id in compartidos.values_list("viaje_id", flat=True).iterator():
+            snapshot.regenerar(viaje_id)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"{total} snapshots generados"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api import catalogo
+from api.models import Actividad, Hotel
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto de actividades y hoteles (tsvector en Postgres, FTS5 en SQLite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for modelo in (Actividad, Hotel):
+            total = 0
+            ultimo_id = 0
+            while True:
+                ids = list(modelo.objects.filter(id__gt=ultimo_id).order_by("id").values_list("id", flat=True)[:options["lote"]])
+                if not ids:
+                    break
+                catalogo.actualizar(modelo, ids)
+                total += len(ids)
+                ultimo_id = ids[-1]
+            self.stdout.write(self.style.SUCCESS(f"{modelo.__name__}: {total} filas indexadas"))
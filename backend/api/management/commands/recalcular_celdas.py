@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import geo
+from api.models import Actividad, Hotel
+
+
+class Command(BaseCommand):
+    help = "Rellena la celda de la rejilla espacial de actividades y hoteles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true", help="Recalcular también las que ya tienen celda")
+        parser.add_argument("--lote", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for modelo in (Actividad, Hotel):
+            total = 0
+            ultimo_id = 0
+            while True:
+                filas = modelo.objects.filter(id__gt=ultimo_id).order_by("id")
+                if not options["todos"]:
+                    filas = filas.filter(celda__isnull=True)
+                filas = list(filas.only("id", "latitud", "longitud")[:options["lote"]])
+                if not filas:
+                    break
+                for fila in filas:
+                    fila.celda = geo.celda(fila.latitud, fila.longitud)
+                with transaction.atomic():
+                    modelo.objects.bulk_update(filas, ["celda"])
+                total += len(filas)
+                ultimo_id = filas[-1].id
+            self.stdout.write(self.style.SUCCESS(f"{modelo.__name__}: {total} celdas recalculadas"))
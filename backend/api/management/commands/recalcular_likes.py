@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import LikeViaje, ViajeCompartido
+
+
+class Command(BaseCommand):
+    help = "Recalcula likes_count de todos los viajes compartidos a partir de LikeViaje"
+
+    def handle(self, *args, **options):
+        likes = (
+            LikeViaje.objects.filter(viaje_compartido=OuterRef("pk"))
+            .values("viaje_compartido")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        # Un único UPDATE con subconsulta correlacionada, sin traer filas a Python
+        actualizados = ViajeCompartido.objects.update(
+            likes_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+            version=F("version") + 1,
+        )
+        self.stdout.write(self.style.SUCCESS(f"likes_count recalculado en {actualizados} viajes compartidos"))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.popularidad import recalcular_pendientes
+
+
+class Command(BaseCommand):
+    help = "Recalcula el score de popularidad de los viajes compartidos cuyos likes han cambiado"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=int, default=0,
+            help="Segundos entre pasadas; si se indica, el comando se queda corriendo como worker",
+        )
+        parser.add_argument("--lote", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            total = recalcular_pendientes(lote=options["lote"])
+            if total or not options["intervalo"]:
+                self.stdout.write(f"{total} scores recalculados")
+            if not options["intervalo"]:
+                return
+            time.sleep(options["intervalo"])
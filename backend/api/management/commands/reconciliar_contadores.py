@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api import contadores
+
+
+class Command(BaseCommand):
+    help = "Detecta y corrige desajustes en seguidores_count/siguiendo_count de los usuarios"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo mostrar los usuarios desajustados")
+
+    def handle(self, *args, **options):
+        desajustados = contadores.desajustados()
+        if options["dry_run"]:
+            filas = desajustados.values_list(
+                "id", "username", "seguidores_count", "seguidores_real", "siguiendo_count", "siguiendo_real",
+            )
+            total = 0
+            for id_, username, seguidores, seguidores_real, siguiendo, siguiendo_real in filas.iterator():
+                total += 1
+                self.stdout.write(
+                    f"{id_} {username}: seguidores {seguidores} -> {seguidores_real}, "
+                    f"siguiendo {siguiendo} -> {siguiendo_real}"
+                )
+            self.stdout.write(f"{total} usuarios desajustados")
+            return
+
+        corregidos = contadores.reconciliar()
+        self.stdout.write(self.style.SUCCESS(f"{corregidos} usuarios corregidos"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import CustomUser
+from api.timeline import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el timeline 'siguiendo' precalculado a partir de Relacion y ViajeCompartido"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuario", type=int, help="Reconstruir solo el timeline de este usuario")
+
+    def handle(self, *args, **options):
+        usuarios = CustomUser.objects.order_by("id").values_list("id", flat=True)
+        if options["usuario"]:
+            usuarios = usuarios.filter(id=options["usuario"])
+
+        total = 0
+        for usuario_id in usuarios.iterator():
+            with transaction.atomic():
+                total += reconstruir(usuario_id)
+        self.stdout.write(self.style.SUCCESS(f"{total} entradas de timeline generadas"))
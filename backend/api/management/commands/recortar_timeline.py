@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import timeline
+
+
+class Command(BaseCommand):
+    help = "Recorta a TIMELINE_MAX_ENTRADAS los timelines 'siguiendo' que se han pasado al repartir publicaciones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalo", type=int, default=0,
+            help="Segundos entre pasadas; si se indica, el comando se queda corriendo como worker",
+        )
+        parser.add_argument("--lote", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            total = timeline.recortar_excedidos(lote=options["lote"])
+            if total or not options["intervalo"]:
+                self.stdout.write(f"Timelines recortados: {total}")
+            if not options["intervalo"]:
+                return
+            time.sleep(options["intervalo"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_customuser_es_google'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viajecompartido',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
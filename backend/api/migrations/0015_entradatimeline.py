@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_viajecompartido_likes_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaTimeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_publicacion', models.DateTimeField()),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+                ('viaje_compartido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entradas_timeline', to='api.viajecompartido')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', '-fecha_publicacion', '-viaje_compartido'], name='api_entrada_usuario_f5bb49_idx')],
+                'unique_together': {('usuario', 'viaje_compartido')},
+            },
+        ),
+    ]
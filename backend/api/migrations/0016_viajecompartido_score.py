@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_entradatimeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viajecompartido',
+            name='likes_en_score',
+            field=models.IntegerField(default=-1),
+        ),
+        migrations.AddField(
+            model_name='viajecompartido',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='viajecompartido',
+            index=models.Index(fields=['-score', '-id'], name='api_viajeco_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='viajecompartido',
+            index=models.Index(condition=models.Q(('likes_count', models.F('likes_en_score')), _negated=True), fields=['id'], name='api_viajeco_score_pend_idx'),
+        ),
+    ]
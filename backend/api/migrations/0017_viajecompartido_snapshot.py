@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_viajecompartido_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viajecompartido',
+            name='snapshot',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
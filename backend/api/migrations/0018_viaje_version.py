@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_viajecompartido_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viaje',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='viaje',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_viaje_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividad',
+            name='celda',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='celda',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='actividad',
+            index=models.Index(fields=['celda', 'latitud', 'longitud'], name='api_activid_celda_f7ded3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['celda', 'latitud', 'longitud'], name='api_hotel_celda_60d672_idx'),
+        ),
+    ]
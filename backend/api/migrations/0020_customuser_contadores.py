@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_celdas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='seguidores_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='siguiendo_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
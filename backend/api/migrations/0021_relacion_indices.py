@@ -0,0 +1,21 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_customuser_contadores'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='relacion',
+            index=models.Index(fields=['seguido', 'estado', 'creado'], name='api_relacio_seguido_e0f6fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relacion',
+            index=models.Index(fields=['seguidor', 'estado', 'creado'], name='api_relacio_seguido_14715a_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_relacion_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaPendiente',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('marcado', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SugerenciaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comunes', models.PositiveIntegerField()),
+                ('sugerido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['usuario', '-comunes'], name='api_sugeren_usuario_6cdc93_idx')],
+                'unique_together': {('usuario', 'sugerido')},
+            },
+        ),
+    ]
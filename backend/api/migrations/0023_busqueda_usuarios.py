@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Índice GIN de trigramas para la búsqueda de usuarios (api/busqueda.py). Solo en Postgres:
+# en otras bases de datos la búsqueda usa un índice en memoria.
+CREAR_INDICE = (
+    "CREATE INDEX IF NOT EXISTS api_customuser_username_trgm "
+    "ON api_customuser USING gin ((UPPER(username::text)) gin_trgm_ops)"
+)
+BORRAR_INDICE = "DROP INDEX IF EXISTS api_customuser_username_trgm"
+
+
+def crear_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREAR_INDICE)
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(BORRAR_INDICE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_sugerencias'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
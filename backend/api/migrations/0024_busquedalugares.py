@@ -0,0 +1,28 @@
+# Generated by Django 5.0.3 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_busqueda_usuarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusquedaLugares',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, unique=True)),
+                ('consulta', models.TextField()),
+                ('idioma', models.CharField(max_length=10)),
+                ('resultados', models.JSONField()),
+                ('creado', models.DateTimeField()),
+                ('usado', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['creado'], name='api_busqued_creado_26caa7_idx'), models.Index(fields=['usado'], name='api_busqued_usado_95e1c3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Índice de texto de actividades y hoteles para api/catalogo.py. En Postgres, índice GIN sobre
+# la columna tsvector "busqueda" y relleno de las filas que ya hay; en SQLite, tablas FTS5
+# aparte con rowid = id de la fila.
+MODELOS = ("Actividad", "Hotel")
+
+
+def _vector():
+    return (
+        SearchVector("nombre", weight="A", config="spanish")
+        + SearchVector("direccion", weight="B", config="spanish")
+        + SearchVector("descripcion", weight="C", config="spanish")
+    )
+
+
+def crear_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for nombre in MODELOS:
+        modelo = apps.get_model("api", nombre)
+        tabla = modelo._meta.db_table
+        if vendor == "postgresql":
+            schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {tabla}_busqueda_gin ON {tabla} USING gin (busqueda)")
+            modelo.objects.update(busqueda=_vector())
+        elif vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabla}_fts USING fts5("
+                "nombre, direccion, descripcion, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {tabla}_fts (rowid, nombre, direccion, descripcion) "
+                f"SELECT id, nombre, direccion, descripcion FROM {tabla}"
+            )
+
+
+def borrar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for nombre in MODELOS:
+        tabla = apps.get_model("api", nombre)._meta.db_table
+        if vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {tabla}_busqueda_gin")
+        elif vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {tabla}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_busquedalugares'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividad',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
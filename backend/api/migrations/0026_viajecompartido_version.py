@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_busqueda_lugares'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='viajecompartido',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
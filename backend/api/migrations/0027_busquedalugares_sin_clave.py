@@ -0,0 +1,19 @@
+from django.db import migrations
+
+# Las búsquedas guardadas hasta ahora llevan la URL de la foto con GOOGLE_API_KEY dentro; desde
+# esta versión solo se guarda el photo_reference. Es una caché, así que se vacía sin más.
+
+
+def vaciar(apps, schema_editor):
+    apps.get_model("api", "BusquedaLugares").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_viajecompartido_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(vaciar, migrations.RunPython.noop),
+    ]
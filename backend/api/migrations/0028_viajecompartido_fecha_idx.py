@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_busquedalugares_sin_clave'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='viajecompartido',
+            index=models.Index(fields=['-fecha_publicacion', '-id'], name='api_viajeco_fecha_idx'),
+        ),
+    ]
@@ -1,8 +1,20 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from datetime import date
 
+from . import geo
+
+def excluir_version(instancia, kwargs):
+    # version solo la suben las señales y las vistas con F("version") + 1: un save() completo de
+    # una instancia cargada antes no debe volver a escribir el valor que tenía en memoria
+    if not instancia._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+        kwargs["update_fields"] = [
+            f.name for f in instancia._meta.concrete_fields if not f.primary_key and f.name != "version"
+        ]
+
+
 class Actividad(models.Model):
     nombre = models.CharField(max_length=2000)
     descripcion = models.TextField()
@@ -11,20 +23,53 @@ class Actividad(models.Model):
     latitud = models.FloatField(null=True, blank=True)
     longitud = models.FloatField(null=True, blank=True)
     google_place_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    celda = models.IntegerField(null=True, blank=True, editable=False)
+    # tsvector de nombre/dirección/descripción para api/catalogo.py (solo se rellena en Postgres)
+    busqueda = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['celda', 'latitud', 'longitud']),
+        ]
 
     def __str__(self):
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        # Celda de la rejilla de api/geo.py para las consultas por viewport
+        self.celda = geo.celda(self.latitud, self.longitud)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitud", "longitud"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "celda"}
+        super().save(*args, **kwargs)
+
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     foto_perfil = models.URLField(blank=True, null=True) 
     bio = models.TextField(blank=True, null=True)
     ubicacion = models.CharField(max_length=255, blank=True, null=True)
     es_google = models.BooleanField(default=False) 
+    # Relaciones aceptadas, mantenidos desde api/contadores.py
+    seguidores_count = models.PositiveIntegerField(default=0)
+    siguiendo_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.username  # Retorna el nombre de usuario
 
+class ViajeQuerySet(models.QuerySet):
+    def con_detalle(self, relaciones=('actividades', 'estancias', 'gastos')):
+        # Prefetch de lo que anida ViajeSerializer: mismas consultas para 2 viajes que para 200.
+        # Con ?fields=/?expand= solo se cargan las relaciones pedidas.
+        prefetch = {
+            'actividades': models.Prefetch(
+                'actividadenviaje_set', queryset=ActividadEnViaje.objects.select_related('actividad')
+            ),
+            'estancias': 'estancias__hotel',
+            'gastos': 'gastos',
+        }
+        return self.prefetch_related(*(prefetch[r] for r in relaciones))
+
+
 class Viaje(models.Model):
     nombre = models.CharField(max_length=255)
     ciudad = models.CharField(max_length=255)
@@ -35,10 +80,20 @@ class Viaje(models.Model):
     actividades = models.ManyToManyField(Actividad, through='ActividadEnViaje', related_name="viajes")
     imagen_destacada = models.URLField(blank=True, null=True)
     notas = models.TextField(blank=True, null=True)
+    # Se incrementa con cualquier cambio del viaje o de sus actividades, estancias y gastos
+    # (ver api/signals.py); de aquí salen los ETag de las vistas de viajes.
+    version = models.PositiveIntegerField(default=1)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    objects = ViajeQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.nombre} - {self.ciudad}"
 
+    def save(self, *args, **kwargs):
+        excluir_version(self, kwargs)
+        super().save(*args, **kwargs)
+
 class ActividadEnViaje(models.Model):
     viaje = models.ForeignKey(Viaje, on_delete=models.CASCADE)
     actividad = models.ForeignKey(Actividad, on_delete=models.CASCADE)
@@ -58,9 +113,25 @@ class Hotel(models.Model):
     longitud = models.FloatField(null=True, blank=True)
     imagen = models.URLField(max_length=2000)
     google_place_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    celda = models.IntegerField(null=True, blank=True, editable=False)
+    # tsvector de nombre/dirección/descripción para api/catalogo.py (solo se rellena en Postgres)
+    busqueda = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['celda', 'latitud', 'longitud']),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.ciudad}, {self.pais})"
+
+    def save(self, *args, **kwargs):
+        # Celda de la rejilla de api/geo.py para las consultas por viewport
+        self.celda = geo.celda(self.latitud, self.longitud)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitud", "longitud"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "celda"}
+        super().save(*args, **kwargs)
     
 
 class Relacion(models.Model):
@@ -76,23 +147,96 @@ class Relacion(models.Model):
 
     class Meta:
         unique_together = ('seguidor', 'seguido')
+        indexes = [
+            models.Index(fields=['seguido', 'estado', 'creado']),
+            models.Index(fields=['seguidor', 'estado', 'creado']),
+        ]
 
     def __str__(self):
         return f"{self.seguidor.username} → {self.seguido.username} ({self.estado})"
 
     
 
+class ViajeCompartidoQuerySet(models.QuerySet):
+    def para_feed(self, usuario):
+        # El viaje sale del snapshot, así que cada tarjeta es una sola fila
+        return self.annotate(
+            ya_dado_like=models.Exists(
+                LikeViaje.objects.filter(viaje_compartido=models.OuterRef('pk'), usuario=usuario)
+            )
+        )
+
+
 class ViajeCompartido(models.Model):
     viaje = models.OneToOneField(Viaje, on_delete=models.CASCADE, related_name="compartido")
     comentario = models.TextField(blank=True, null=True)
     publicado_por = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     fecha_publicacion = models.DateTimeField(auto_now_add=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    # Copia serializada del viaje, generada al publicar y al editar el viaje (ver api/snapshot.py)
+    snapshot = models.JSONField(null=True, blank=True)
+    # Ranking de populares precalculado por recalcular_scores (ver api/popularidad.py).
+    # likes_en_score guarda con cuántos likes se calculó: si difiere de likes_count está pendiente.
+    score = models.FloatField(default=0)
+    likes_en_score = models.IntegerField(default=-1)
+    # Sube con cada cambio de lo que devuelve el detalle (snapshot, likes, comentario): es la
+    # versión con la que se guarda en la caché de respuestas
+    version = models.PositiveIntegerField(default=1)
+
+    objects = ViajeCompartidoQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.viaje.nombre} publicado por {self.publicado_por.username}"
 
+    def save(self, *args, **kwargs):
+        excluir_version(self, kwargs)
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-fecha_publicacion']
+        indexes = [
+            # Feeds por cursor (lista general y recientes): ORDER BY fecha_publicacion DESC, id DESC
+            models.Index(fields=['-fecha_publicacion', '-id'], name='api_viajeco_fecha_idx'),
+            models.Index(fields=['-score', '-id'], name='api_viajeco_score_idx'),
+            models.Index(
+                fields=['id'],
+                condition=~models.Q(likes_count=models.F('likes_en_score')),
+                name='api_viajeco_score_pend_idx',
+            ),
+        ]
+
+
+class EntradaTimeline(models.Model):
+    # Feed "siguiendo" precalculado: se rellena al publicar y al aceptar/borrar relaciones
+    usuario = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="timeline")
+    viaje_compartido = models.ForeignKey(ViajeCompartido, on_delete=models.CASCADE, related_name="entradas_timeline")
+    fecha_publicacion = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('usuario', 'viaje_compartido')
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_publicacion', '-viaje_compartido']),
+        ]
+
+
+class SugerenciaUsuario(models.Model):
+    # "Gente que quizá conozcas": top de amigos de amigos por número de seguidos en común,
+    # calculado en lote por calcular_sugerencias (ver api/sugerencias.py)
+    usuario = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="sugerencias")
+    sugerido = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="+")
+    comunes = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('usuario', 'sugerido')
+        indexes = [
+            models.Index(fields=['usuario', '-comunes']),
+        ]
+
+
+class SugerenciaPendiente(models.Model):
+    # Usuarios cuyas relaciones han cambiado desde la última pasada de calcular_sugerencias
+    usuario = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    marcado = models.DateTimeField()
 
 
 class LikeViaje(models.Model):
@@ -138,3 +282,22 @@ class Gasto(models.Model):
 
 
 
+
+
+class BusquedaLugares(models.Model):
+    # Caché persistente de búsquedas de texto en Google Places (ver api/places.py)
+    clave = models.CharField(max_length=64, unique=True)
+    consulta = models.TextField()
+    idioma = models.CharField(max_length=10)
+    resultados = models.JSONField()
+    creado = models.DateTimeField()
+    usado = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['creado']),
+            models.Index(fields=['usado']),
+        ]
+
+    def __str__(self):
+        return f"{self.consulta} ({self.idioma})"
@@ -0,0 +1,107 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacionCursor(BasePagination):
+    # Paginación por cursor opaco sobre un par (campo, desempate) en orden descendente.
+    # Cada página es un WHERE sobre la última fila vista + ORDER BY + LIMIT, sin OFFSET
+    # ni COUNT(*), así que lo que se publique mientras tanto no desplaza las páginas.
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, campos=("fecha_publicacion", "id")):
+        self.campos = campos
+        self.page_size = getattr(settings, "FEED_PAGE_SIZE", 20)
+        self.max_page_size = getattr(settings, "FEED_MAX_PAGE_SIZE", 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        tamano = self.get_page_size(request)
+        campo, desempate = self.campos
+
+        queryset = queryset.order_by(f"-{campo}", f"-{desempate}")
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            valor, ultimo = self.convertir(queryset, cursor)
+            queryset = queryset.filter(
+                Q(**{f"{campo}__lt": valor}) | Q(**{campo: valor, f"{desempate}__lt": ultimo})
+            )
+
+        # Se pide una fila de más para saber si hay página siguiente sin contar
+        filas = list(queryset[:tamano + 1])
+        self.siguiente = filas[tamano - 1] if len(filas) > tamano else None
+        return filas[:tamano]
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if tamano <= 0:
+            return self.page_size
+        return min(tamano, self.max_page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        cursor = self.encode_cursor(self.siguiente)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def valor(self, fila, campo):
+        return fila[campo] if isinstance(fila, dict) else getattr(fila, campo)
+
+    def encode_cursor(self, fila):
+        posicion = []
+        for campo in self.campos:
+            valor = self.valor(fila, campo)
+            # Las fechas van en isoformat completo: perder microsegundos rompería el desempate
+            posicion.append(valor.isoformat() if hasattr(valor, "isoformat") else valor)
+        crudo = json.dumps(posicion, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            relleno = "=" * (-len(cursor) % 4)
+            posicion = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            valor, ultimo = posicion
+        except (TypeError, ValueError):
+            raise NotFound("Cursor inválido")
+        return valor, ultimo
+
+    def campo_modelo(self, queryset, campo):
+        # Los campos del cursor pueden ser anotaciones (fecha_timeline) o columnas del modelo
+        anotacion = queryset.query.annotations.get(campo)
+        if anotacion is not None:
+            return anotacion.output_field
+        return queryset.model._meta.get_field(campo)
+
+    def convertir(self, queryset, cursor):
+        # Un cursor bien formado puede traer tipos que no son: se validan antes de consultar
+        posicion = []
+        for campo, valor in zip(self.campos, cursor):
+            try:
+                valor = self.campo_modelo(queryset, campo).to_python(valor)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound("Cursor inválido")
+            if valor is None or isinstance(valor, (list, dict)):
+                raise NotFound("Cursor inválido")
+            posicion.append(valor)
+        return posicion
@@ -0,0 +1,363 @@
+import asyncio
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .models import BusquedaLugares
+
+# Caché de búsquedas de texto en Google Places para buscar_actividades y buscar_hoteles.
+# La clave es la consulta normalizada + idioma y el valor la lista de resultados ya procesada.
+# De la foto se guarda solo el photo_reference: la URL lleva GOOGLE_API_KEY y se monta al leer.
+# Dos niveles: un LRU en memoria del proceso y la tabla BusquedaLugares, que caduca a los
+# PLACES_CACHE_TTL segundos y se poda de vez en cuando (caducadas y las menos usadas por
+# encima de PLACES_CACHE_MAX_FILAS). El cliente se elige con PLACES_CLIENTE para poder usar
+# ClienteFalso sin red ni cuota.
+#
+# ClienteGoogle reutiliza conexiones (Session con pool y keep-alive), corta por tiempo y
+# reintenta con espera creciente los 5xx y fallos de conexión. Si varios hilos del proceso
+# piden a la vez la misma consulta que no está en caché, solo uno llama a Google y el resto
+# espera su resultado.
+#
+# Las vistas async (ASGI) usan abuscar/abuscar_texto: httpx.AsyncClient con pool propio y un
+# semáforo que limita a PLACES_ASYNC_CONCURRENCIA las peticiones a Google en vuelo por
+# proceso; el resto espera sin ocupar un hilo. Hay uno por event loop y se cierra con él.
+URL_TEXTSEARCH = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+URL_FOTO = "https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={}&key={}"
+
+# Solo se actualiza "usado" si han pasado al menos estos segundos, para no escribir en cada acierto
+REFRESCO_USADO = 3600
+
+
+class ErrorPlaces(Exception):
+    pass
+
+
+def _procesar(data):
+    # Errores de cuota o clave no se deben guardar como "sin resultados"
+    if data.get("status") not in (None, "OK", "ZERO_RESULTS"):
+        raise ErrorPlaces(data.get("error_message") or data["status"])
+
+    resultados = []
+    for lugar in data.get("results", []):
+        resultados.append({
+            "nombre": lugar.get("name"),
+            "direccion": lugar.get("formatted_address"),
+            "latitud": lugar["geometry"]["location"]["lat"],
+            "longitud": lugar["geometry"]["location"]["lng"],
+            "foto_referencia": lugar["photos"][0]["photo_reference"] if "photos" in lugar else None,
+            "place_id": lugar.get("place_id"),
+        })
+    return resultados
+
+
+def _con_foto(resultados):
+    # Los resultados tal y como se devuelven: con la URL de la foto en vez de la referencia
+    return [{
+        **{campo: valor for campo, valor in lugar.items() if campo != "foto_referencia"},
+        "foto": URL_FOTO.format(lugar["foto_referencia"], settings.GOOGLE_API_KEY) if lugar.get("foto_referencia") else None,
+    } for lugar in resultados]
+
+
+class ClienteGoogle:
+    REINTENTAR = (500, 502, 503, 504)
+
+    def __init__(self):
+        reintentos = Retry(
+            total=getattr(settings, "PLACES_REINTENTOS", 2),
+            backoff_factor=0.3,
+            status_forcelist=self.REINTENTAR,
+            allowed_methods=("GET",),
+        )
+        adaptador = HTTPAdapter(pool_maxsize=getattr(settings, "PLACES_POOL", 10), max_retries=reintentos)
+        self.sesion = requests.Session()
+        self.sesion.headers["User-Agent"] = "Mozilla/5.0"
+        self.sesion.mount("https://", adaptador)
+        self._lock = threading.Lock()
+        self._async = {}
+
+    def buscar_texto(self, consulta, idioma):
+        params = {"query": consulta, "language": idioma, "key": settings.GOOGLE_API_KEY}
+        # (conexión, lectura) en segundos
+        r = self.sesion.get(URL_TEXTSEARCH, params=params, timeout=getattr(settings, "PLACES_TIMEOUT", (3.05, 10)))
+        r.raise_for_status()
+        return _procesar(r.json())
+
+    async def _vida(self, loop, cliente):
+        # asyncio.run (y uvicorn, que lo usa) cierra los generadores async pendientes antes de
+        # cerrar el loop: así el AsyncClient se cierra con aclose() en su propio loop
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._async.pop(loop, None)
+            await cliente.aclose()
+
+    async def _cliente_async(self):
+        # Un AsyncClient y un semáforo por event loop, porque quedan ligados al loop que los crea
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            actual = self._async.get(loop)
+        if actual is None:
+            concurrencia = getattr(settings, "PLACES_ASYNC_CONCURRENCIA", 100)
+            conexion, lectura = getattr(settings, "PLACES_TIMEOUT", (3.05, 10))
+            transporte = httpx.AsyncHTTPTransport(
+                retries=getattr(settings, "PLACES_REINTENTOS", 2),
+                limits=httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia),
+            )
+            cliente = httpx.AsyncClient(
+                transport=transporte,
+                timeout=httpx.Timeout(lectura, connect=conexion, pool=None),
+                headers={"User-Agent": "Mozilla/5.0"},
+            )
+            # El loop solo guarda una referencia débil al generador: se mantiene aquí
+            vida = self._vida(loop, cliente)
+            actual = (cliente, asyncio.Semaphore(concurrencia), vida)
+            with self._lock:
+                self._async[loop] = actual
+            await vida.__anext__()
+        return actual
+
+    async def abuscar_texto(self, consulta, idioma):
+        cliente, semaforo, _ = await self._cliente_async()
+        params = {"query": consulta, "language": idioma, "key": settings.GOOGLE_API_KEY}
+        reintentos = getattr(settings, "PLACES_REINTENTOS", 2)
+        async with semaforo:
+            # httpx solo reintenta fallos de conexión; los 5xx se reintentan aquí como en la Session
+            for intento in range(reintentos + 1):
+                r = await cliente.get(URL_TEXTSEARCH, params=params)
+                if r.status_code not in self.REINTENTAR or intento == reintentos:
+                    break
+                await asyncio.sleep(0.3 * 2 ** intento)
+        r.raise_for_status()
+        return _procesar(r.json())
+
+
+class ClienteFalso:
+    # Resultados deterministas sin salir a la red, para desarrollo y pruebas
+    llamadas = 0
+
+    def buscar_texto(self, consulta, idioma):
+        ClienteFalso.llamadas += 1
+        semilla = int(hashlib.sha256(f"{idioma}:{consulta}".encode()).hexdigest()[:8], 16)
+        return [{
+            "nombre": f"{consulta} {i + 1}",
+            "direccion": f"Calle Falsa {semilla % 100 + i}, {consulta}",
+            "latitud": round(37.0 + (semilla % 1000) / 1000 + i / 100, 6),
+            "longitud": round(-6.0 + (semilla % 997) / 1000 + i / 100, 6),
+            "foto_referencia": None,
+            "place_id": f"falso-{semilla:x}-{i}",
+        } for i in range(3)]
+
+    async def abuscar_texto(self, consulta, idioma):
+        return self.buscar_texto(consulta, idioma)
+
+
+class _Llamada:
+
+    def __init__(self):
+        self.hecha = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class Singleflight:
+    # Una sola ejecución por clave a la vez; quien llega mientras tanto recibe el mismo
+    # resultado (o la misma excepción). La espera está acotada por el timeout del cliente.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso = {}
+
+    def hacer(self, clave, funcion):
+        with self._lock:
+            llamada = self._en_curso.get(clave)
+            propia = llamada is None
+            if propia:
+                llamada = self._en_curso[clave] = _Llamada()
+
+        if not propia:
+            llamada.hecha.wait()
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado, False
+
+        try:
+            llamada.resultado = funcion()
+        except Exception as e:
+            llamada.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            llamada.hecha.set()
+        return llamada.resultado, True
+
+
+class SingleflightAsync:
+    # Lo mismo entre corrutinas de un event loop. La tarea compartida va protegida con shield
+    # para que si se cancela una petición (cliente que se desconecta) no se cancele a las demás.
+
+    def __init__(self):
+        self._en_curso = {}
+
+    async def hacer(self, clave, funcion):
+        loop = asyncio.get_running_loop()
+        clave = (loop, clave)
+        tarea = self._en_curso.get(clave)
+        if tarea is not None:
+            return await asyncio.shield(tarea), False
+
+        tarea = loop.create_task(funcion())
+        self._en_curso[clave] = tarea
+        tarea.add_done_callback(lambda _: self._en_curso.pop(clave, None))
+        return await asyncio.shield(tarea), True
+
+
+def normalizar(consulta):
+    return " ".join(unicodedata.normalize("NFKC", consulta).casefold().split())
+
+
+def _clave(consulta, idioma):
+    return hashlib.sha256(f"{idioma}:{consulta}".encode("utf-8")).hexdigest()
+
+
+class CacheLugares:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self._cliente = None
+        self._vuelos = Singleflight()
+        self._vuelos_async = SingleflightAsync()
+        self._escrituras = 0
+        self.hits_memoria = 0
+        self.hits_bd = 0
+        self.misses = 0
+        self.agrupadas = 0
+
+    @property
+    def cliente(self):
+        if self._cliente is None:
+            self._cliente = import_string(getattr(settings, "PLACES_CLIENTE", "api.places.ClienteGoogle"))()
+        return self._cliente
+
+    def _ttl(self):
+        return timedelta(seconds=getattr(settings, "PLACES_CACHE_TTL", 7 * 24 * 3600))
+
+    def _guardar_local(self, clave, caduca, resultados):
+        with self._lock:
+            self._local[clave] = (caduca, resultados)
+            self._local.move_to_end(clave)
+            while len(self._local) > getattr(settings, "PLACES_LRU_MAX", 1000):
+                self._local.popitem(last=False)
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def _leer_local(self, clave, ahora):
+        with self._lock:
+            entrada = self._local.get(clave)
+            if entrada is not None and entrada[0] > ahora:
+                self._local.move_to_end(clave)
+                self.hits_memoria += 1
+                return entrada[1]
+        return None
+
+    def _leer_bd(self, clave, ahora):
+        fila = BusquedaLugares.objects.filter(clave=clave, creado__gt=ahora - self._ttl()).first()
+        if fila is None:
+            return None
+        self._contar("hits_bd")
+        if (ahora - fila.usado).total_seconds() > REFRESCO_USADO:
+            BusquedaLugares.objects.filter(pk=fila.pk).update(usado=ahora)
+        self._guardar_local(clave, fila.creado + self._ttl(), fila.resultados)
+        return fila.resultados
+
+    def buscar(self, consulta, idioma="es"):
+        consulta = normalizar(consulta)
+        clave = _clave(consulta, idioma)
+        ahora = now()
+
+        resultados = self._leer_local(clave, ahora)
+        if resultados is None:
+            resultados = self._leer_bd(clave, ahora)
+        if resultados is not None:
+            return _con_foto(resultados)
+
+        resultados, propia = self._vuelos.hacer(clave, lambda: self._traer(clave, consulta, idioma, ahora))
+        self._contar("misses" if propia else "agrupadas")
+        return _con_foto(resultados)
+
+    async def abuscar(self, consulta, idioma="es"):
+        consulta = normalizar(consulta)
+        clave = _clave(consulta, idioma)
+        ahora = now()
+
+        resultados = self._leer_local(clave, ahora)
+        if resultados is None:
+            resultados = await sync_to_async(self._leer_bd)(clave, ahora)
+        if resultados is not None:
+            return _con_foto(resultados)
+
+        resultados, propia = await self._vuelos_async.hacer(clave, lambda: self._atraer(clave, consulta, idioma, ahora))
+        self._contar("misses" if propia else "agrupadas")
+        return _con_foto(resultados)
+
+    def _traer(self, clave, consulta, idioma, ahora):
+        resultados = self.cliente.buscar_texto(consulta, idioma)
+        self._guardar(clave, consulta, idioma, ahora, resultados)
+        return resultados
+
+    async def _atraer(self, clave, consulta, idioma, ahora):
+        resultados = await self.cliente.abuscar_texto(consulta, idioma)
+        await sync_to_async(self._guardar)(clave, consulta, idioma, ahora, resultados)
+        return resultados
+
+    def _guardar(self, clave, consulta, idioma, ahora, resultados):
+        BusquedaLugares.objects.bulk_create(
+            [BusquedaLugares(clave=clave, consulta=consulta, idioma=idioma, resultados=resultados, creado=ahora, usado=ahora)],
+            update_conflicts=True, update_fields=["resultados", "creado", "usado"], unique_fields=["clave"],
+        )
+        self._guardar_local(clave, ahora + self._ttl(), resultados)
+
+        with self._lock:
+            self._escrituras += 1
+            purgar = self._escrituras % getattr(settings, "PLACES_PURGA_CADA", 100) == 0
+        if purgar:
+            self.purgar()
+
+    def purgar(self):
+        # Caducadas fuera y, si aún sobran filas, las que llevan más tiempo sin usarse
+        BusquedaLugares.objects.filter(creado__lte=now() - self._ttl()).delete()
+        maximo = getattr(settings, "PLACES_CACHE_MAX_FILAS", 50000)
+        corte = BusquedaLugares.objects.order_by("-usado").values_list("usado", flat=True)[maximo:maximo + 1]
+        if corte:
+            BusquedaLugares.objects.filter(usado__lte=corte[0]).delete()
+
+    def estadisticas(self):
+        with self._lock:
+            # Las agrupadas no llegan a Google, así que cuentan como acierto
+            hits = self.hits_memoria + self.hits_bd + self.agrupadas
+            total = hits + self.misses
+            return {
+                "hits_memoria": self.hits_memoria,
+                "hits_bd": self.hits_bd,
+                "agrupadas": self.agrupadas,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else None,
+            }
+
+
+lugares = CacheLugares()
@@ -0,0 +1,51 @@
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import ViajeCompartido
+
+# Ranking "hot" al estilo Reddit: log10 de los likes más la antigüedad en segundos / escala.
+# Cada orden de magnitud de likes equivale a SCORE_SEGUNDOS_POR_ORDEN segundos de novedad.
+# Como la parte temporal solo depende de la fecha de publicación, el score no caduca:
+# solo hay que recalcularlo cuando cambian los likes.
+EPOCA = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def calcular_score(likes, fecha_publicacion):
+    escala = getattr(settings, "SCORE_SEGUNDOS_POR_ORDEN", 45000)
+    orden = math.log10(likes + 1)
+    return round(orden + (fecha_publicacion - EPOCA).total_seconds() / escala, 7)
+
+
+def puntuar(compartido):
+    compartido.score = calcular_score(compartido.likes_count, compartido.fecha_publicacion)
+    compartido.likes_en_score = compartido.likes_count
+    ViajeCompartido.objects.filter(pk=compartido.pk).update(
+        score=compartido.score, likes_en_score=compartido.likes_en_score
+    )
+
+
+def recalcular_pendientes(lote=1000):
+    # Solo toca los viajes cuyos likes han cambiado desde la última pasada. Si entra un like
+    # mientras tanto, likes_en_score se queda con el valor leído y la fila sigue pendiente.
+    total = 0
+    ultimo_id = 0
+    while True:
+        pendientes = list(
+            ViajeCompartido.objects.exclude(likes_count=F("likes_en_score"))
+            .filter(id__gt=ultimo_id)
+            .order_by("id")
+            .only("id", "likes_count", "fecha_publicacion")[:lote]
+        )
+        if not pendientes:
+            return total
+        for compartido in pendientes:
+            compartido.score = calcular_score(compartido.likes_count, compartido.fecha_publicacion)
+            compartido.likes_en_score = compartido.likes_count
+        with transaction.atomic():
+            ViajeCompartido.objects.bulk_update(pendientes, ["score", "likes_en_score"])
+        total += len(pendientes)
+        ultimo_id = pendientes[-1].id
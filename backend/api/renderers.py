@@ -0,0 +1,23 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # sin orjson se usa el renderer JSON de DRF tal cual
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    # Misma salida que JSONRenderer (compacta, UTF-8, \u2028/\u2029 escapados) pero con orjson.
+    # Fechas, Decimal y demás tipos no nativos pasan por el encoder de DRF para formatearse igual.
+    opciones = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=self.opciones)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
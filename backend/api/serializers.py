@@ -4,7 +4,7 @@ from .models import Actividad, CustomUser, Viaje, Hotel, ActividadEnViaje, Relac
 class ActividadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Actividad
-        fields = '__all__'
+        exclude = ['celda', 'busqueda']
 
 class CustomUserSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
@@ -34,7 +34,7 @@ class ActividadConFechaSerializer(serializers.ModelSerializer):
 class HotelSerializer(serializers.ModelSerializer):
     class Meta:
         model = Hotel
-        fields = '__all__'
+        exclude = ['celda', 'busqueda']
 
 class GastoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -69,8 +69,21 @@ class ViajeSerializer(serializers.ModelSerializer):
             'gastos',
         ]
 
+    # Relaciones anidadas que solo se incluyen con ?expand= cuando se piden campos concretos
+    RELACIONES = ('actividades', 'estancias', 'gastos')
+
+    def __init__(self, *args, campos=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
     def get_actividades(self, obj):
-        relaciones = ActividadEnViaje.objects.filter(viaje=obj)
+        # Usa el prefetch de Viaje.objects.con_detalle() si el queryset lo trae
+        if 'actividadenviaje_set' in getattr(obj, '_prefetched_objects_cache', {}):
+            relaciones = obj.actividadenviaje_set.all()
+        else:
+            relaciones = obj.actividadenviaje_set.select_related('actividad')
         return ActividadConFechaSerializer(relaciones, many=True).data
 
 class ActividadEnViajeSerializer(serializers.ModelSerializer):
@@ -85,15 +98,27 @@ class RelacionSerializer(serializers.ModelSerializer):
 
 
 class ViajeCompartidoSerializer(serializers.ModelSerializer):
-    viaje = ViajeSerializer()
-    likes_count = serializers.IntegerField(source='likes.count', read_only=True)
+    viaje = serializers.SerializerMethodField()
+    likes_count = serializers.IntegerField(read_only=True)
     ya_dado_like = serializers.SerializerMethodField()
 
     class Meta:
         model = ViajeCompartido
         fields = ['id', 'viaje', 'comentario', 'publicado_por', 'fecha_publicacion', 'likes_count', 'ya_dado_like']
 
+    def get_viaje(self, obj):
+        # Snapshot guardado al publicar; los publicados antes de tenerlo se serializan en vivo
+        campos = self.context.get("campos_viaje")
+        if obj.snapshot is not None:
+            if campos is None:
+                return obj.snapshot
+            return {k: v for k, v in obj.snapshot.items() if k in campos}
+        return ViajeSerializer(obj.viaje, campos=campos).data
+
     def get_ya_dado_like(self, obj):
+        # Anotado con Exists() en los querysets del feed
+        if hasattr(obj, "ya_dado_like"):
+            return obj.ya_dado_like
         user = self.context.get("request").user
         return obj.likes.filter(usuario=user).exists()
     
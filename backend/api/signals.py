@@ -0,0 +1,101 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from . import busqueda, cache, catalogo, cercanos, clusters, grafo, snapshot, sugerencias
+from .models import Actividad, ActividadEnViaje, CustomUser, EstanciaHotel, Gasto, Hotel, Relacion, Viaje, ViajeCompartido
+
+
+def _viaje_modificado(viaje_id):
+    # Nueva versión para los ETag; update() no vuelve a disparar post_save
+    Viaje.objects.filter(pk=viaje_id).update(version=F("version") + 1, actualizado=now())
+    cache.respuestas.invalidar(cache.clave_viaje(viaje_id))
+    # Se aplaza al commit para no regenerar a mitad de un borrado en cascada
+    transaction.on_commit(lambda: snapshot.regenerar(viaje_id))
+
+
+@receiver(post_save, sender=Viaje)
+def viaje_guardado(sender, instance, created, **kwargs):
+    if not created:
+        _viaje_modificado(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ActividadEnViaje)
+@receiver([post_save, post_delete], sender=EstanciaHotel)
+@receiver([post_save, post_delete], sender=Gasto)
+def detalle_viaje_modificado(sender, instance, **kwargs):
+    _viaje_modificado(instance.viaje_id)
+
+
+@receiver(post_delete, sender=Viaje)
+def viaje_borrado(sender, instance, **kwargs):
+    cache.respuestas.invalidar(cache.clave_viaje(instance.pk))
+
+
+@receiver(post_save, sender=ViajeCompartido)
+def compartido_guardado(sender, instance, created, **kwargs):
+    if not created:
+        ViajeCompartido.objects.filter(pk=instance.pk).update(version=F("version") + 1)
+    cache.respuestas.invalidar(cache.clave_compartido(instance.pk))
+
+
+@receiver(post_delete, sender=ViajeCompartido)
+def compartido_borrado(sender, instance, **kwargs):
+    cache.respuestas.invalidar(cache.clave_compartido(instance.pk))
+
+
+def _distinta(a, b):
+    try:
+        return tuple(map(float, a)) != tuple(map(float, b))
+    except (TypeError, ValueError):
+        return a != b
+
+
+@receiver(pre_save, sender=Actividad)
+@receiver(pre_save, sender=Hotel)
+def catalogo_por_guardar(sender, instance, update_fields=None, **kwargs):
+    # Posición anterior, para invalidar también las teselas de donde sale el lugar
+    instance._posicion_anterior = None
+    if instance.pk is not None and (update_fields is None or {"latitud", "longitud"} & set(update_fields)):
+        instance._posicion_anterior = sender.objects.filter(pk=instance.pk).values_list("latitud", "longitud").first()
+
+
+@receiver([post_save, post_delete], sender=Actividad)
+@receiver([post_save, post_delete], sender=Hotel)
+def catalogo_modificado(sender, instance, update_fields=None, **kwargs):
+    # Solo cambian las teselas si el lugar aparece, desaparece o se mueve
+    posicion = (instance.latitud, instance.longitud)
+    anterior = getattr(instance, "_posicion_anterior", None)
+    if kwargs.get("created") or kwargs["signal"] is post_delete:
+        posiciones = [posicion]
+    elif anterior is not None and _distinta(anterior, posicion):
+        posiciones = [anterior, posicion]
+    else:
+        posiciones = []
+    if posiciones:
+        transaction.on_commit(lambda: clusters.invalidar(posiciones))
+    if kwargs["signal"] is post_delete:
+        tipo, id_ = ("actividad" if sender is Actividad else "hotel"), instance.pk
+        transaction.on_commit(lambda: cercanos.indice.retirar(tipo, id_))
+    if update_fields is None or set(update_fields) & set(catalogo.CAMPOS):
+        catalogo.actualizar(sender, [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Relacion)
+def relacion_modificada(sender, instance, **kwargs):
+    # Al confirmar: si no, otra petición podría cachear la versión nueva con datos de antes
+    seguidor_id, seguido_id = instance.seguidor_id, instance.seguido_id
+    transaction.on_commit(lambda: grafo.seguimientos.invalidar(seguidor_id, seguido_id))
+    transaction.on_commit(lambda: sugerencias.marcar(seguidor_id))
+
+
+@receiver(post_save, sender=CustomUser)
+def usuario_guardado(sender, instance, **kwargs):
+    busqueda.indice.actualizar(instance.pk, instance.username)
+
+
+@receiver(post_delete, sender=CustomUser)
+def usuario_borrado(sender, instance, **kwargs):
+    busqueda.indice.actualizar(instance.pk)
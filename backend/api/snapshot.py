@@ -0,0 +1,23 @@
+from django.db.models import F
+
+from . import cache
+from .models import Viaje, ViajeCompartido
+from .serializers import ViajeSerializer
+
+
+def generar(viaje):
+    # Misma salida que ViajeSerializer, lista para guardarse en el JSONField
+    viaje = Viaje.objects.con_detalle().get(pk=viaje.pk)
+    return ViajeSerializer(viaje).data
+
+
+def regenerar(viaje_id):
+    compartido = ViajeCompartido.objects.filter(viaje_id=viaje_id).only("id", "viaje").first()
+    if compartido is None:
+        return
+    try:
+        datos = generar(compartido.viaje)
+    except Viaje.DoesNotExist:
+        return
+    ViajeCompartido.objects.filter(pk=compartido.pk).update(snapshot=datos, version=F("version") + 1)
+    cache.respuestas.invalidar(cache.clave_compartido(compartido.pk))
@@ -0,0 +1,105 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+from scipy import sparse
+
+from .models import CustomUser, Relacion, SugerenciaPendiente, SugerenciaUsuario
+
+# Sugerencias de amigos de amigos. Con A la matriz dispersa de relaciones aceptadas
+# (A[x, y] = 1 si x sigue a y), (A @ A)[x, z] es el número de usuarios que x sigue y que a su
+# vez siguen a z. Se quitan x mismo y los que x ya sigue o ha pedido seguir, y se guarda el
+# top SUGERENCIAS_TOP por usuario.
+#
+# En modo incremental solo se recalculan los usuarios marcados en SugerenciaPendiente (sus
+# relaciones salientes cambiaron) y quienes les siguen, que son los únicos cuyos caminos de
+# dos saltos pueden haber cambiado. De Relacion solo se leen las filas que hacen falta para
+# ellos: todas sus relaciones salientes y las aceptadas de los usuarios a los que siguen.
+
+
+def marcar(usuario_id):
+    # update_conflicts renueva la fecha si ya estaba marcado, para que una pasada en curso no lo borre
+    if CustomUser.objects.filter(pk=usuario_id).exists():
+        SugerenciaPendiente.objects.bulk_create(
+            [SugerenciaPendiente(usuario_id=usuario_id, marcado=now())],
+            update_conflicts=True, update_fields=["marcado"], unique_fields=["usuario"],
+        )
+
+
+def _matriz(pares, ids):
+    n = len(ids)
+    if not len(pares):
+        return sparse.csr_matrix((n, n), dtype=np.int32)
+    filas, columnas = np.searchsorted(ids, pares[:, 0]), np.searchsorted(ids, pares[:, 1])
+    return sparse.csr_matrix((np.ones(len(pares), dtype=np.int32), (filas, columnas)), shape=(n, n))
+
+
+def _pares(queryset):
+    return np.array(list(queryset.values_list("seguidor_id", "seguido_id")), dtype=np.int64).reshape(-1, 2)
+
+
+def _top(fila, top):
+    # Más comunes primero y, a igualdad, el id más bajo
+    orden = np.lexsort((fila.indices, -fila.data))[:top]
+    return fila.indices[orden], fila.data[orden]
+
+
+def calcular(completo=False, lote=1000):
+    top = getattr(settings, "SUGERENCIAS_TOP", 50)
+    inicio = now()
+    pendientes = None if completo else list(SugerenciaPendiente.objects.values_list("usuario_id", flat=True))
+    if pendientes == []:
+        return 0
+
+    if completo:
+        aceptadas = _pares(Relacion.objects.filter(estado="aceptada"))
+        todas = _pares(Relacion.objects.all())
+    else:
+        seguidores = Relacion.objects.filter(estado="aceptada", seguido_id__in=pendientes).values("seguidor_id")
+        origen = Q(seguidor_id__in=pendientes) | Q(seguidor_id__in=seguidores)
+        seguidos = Relacion.objects.filter(origen, estado="aceptada").values("seguido_id")
+        aceptadas = _pares(Relacion.objects.filter(origen | Q(seguidor_id__in=seguidos), estado="aceptada"))
+        todas = _pares(Relacion.objects.filter(origen))
+    ids = np.unique(np.concatenate((todas, aceptadas)))
+    A = _matriz(aceptadas, ids)
+    # Excluidos: uno mismo y cualquiera con quien ya haya relación, aceptada o pendiente
+    excluidos = (_matriz(todas, ids) + sparse.identity(len(ids), dtype=np.int32, format="csr")).astype(bool)
+
+    if completo:
+        objetivo = np.arange(len(ids))
+        sin_relaciones = SugerenciaUsuario.objects.exclude(
+            usuario_id__in=Relacion.objects.filter(estado="aceptada").values("seguidor_id")
+        )
+    else:
+        marcados = np.array(pendientes, dtype=np.int64)
+        posiciones = np.searchsorted(ids, marcados)
+        con_relaciones = np.isin(marcados, ids)
+        presentes = posiciones[con_relaciones]
+        objetivo = np.union1d(presentes, A[:, presentes].nonzero()[0])
+        sin_relaciones = SugerenciaUsuario.objects.filter(usuario_id__in=marcados[~con_relaciones].tolist())
+
+    sin_relaciones.delete()
+    for i in range(0, len(objetivo), lote):
+        bloque = objetivo[i:i + lote]
+        comunes = (A[bloque] @ A).tocsr()
+        comunes = (comunes - comunes.multiply(excluidos[bloque])).tocsr()
+        comunes.eliminate_zeros()
+
+        nuevas = []
+        for j, x in enumerate(bloque):
+            sugeridos, cuentas = _top(comunes.getrow(j), top)
+            nuevas += [
+                SugerenciaUsuario(usuario_id=int(ids[x]), sugerido_id=int(ids[z]), comunes=int(c))
+                for z, c in zip(sugeridos, cuentas)
+            ]
+        with transaction.atomic():
+            SugerenciaUsuario.objects.filter(usuario_id__in=ids[bloque].tolist()).delete()
+            SugerenciaUsuario.objects.bulk_create(nuevas, batch_size=1000)
+
+    # Los marcados durante la pasada se quedan para la siguiente
+    marcas = SugerenciaPendiente.objects.filter(marcado__lte=inicio)
+    if not completo:
+        marcas = marcas.filter(usuario_id__in=pendientes)
+    marcas.delete()
+    return len(objetivo)
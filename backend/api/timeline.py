@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import EntradaTimeline, Relacion, ViajeCompartido
+
+
+def limite_timeline():
+    return getattr(settings, "TIMELINE_MAX_ENTRADAS", 500)
+
+
+def recortar(usuarios_ids):
+    # Borra lo que quede por debajo de las N entradas más recientes de cada usuario
+    sobrantes = (
+        EntradaTimeline.objects.filter(usuario_id__in=usuarios_ids)
+        .annotate(posicion=Window(
+            RowNumber(),
+            partition_by=F("usuario_id"),
+            order_by=[F("fecha_publicacion").desc(), F("viaje_compartido_id").desc()],
+        ))
+        .filter(posicion__gt=limite_timeline())
+        .values("pk")
+    )
+    EntradaTimeline.objects.filter(pk__in=sobrantes).delete()
+
+
+def recortar_excedidos(lote=1000):
+    # Pasada periódica (comando recortar_timeline): solo los timelines que pasan de N entradas
+    excedidos = list(
+        EntradaTimeline.objects.values("usuario_id")
+        .annotate(total=Count("id"))
+        .filter(total__gt=limite_timeline())
+        .values_list("usuario_id", flat=True)
+    )
+    for i in range(0, len(excedidos), lote):
+        recortar(excedidos[i:i + lote])
+    return len(excedidos)
+
+
+def repartir_publicacion(compartido):
+    # Fan-out al publicar: una entrada en el timeline de cada seguidor aceptado
+    seguidores = Relacion.objects.filter(
+        seguido_id=compartido.publicado_por_id, estado="aceptada"
+    ).values_list("seguidor_id", flat=True)
+    EntradaTimeline.objects.bulk_create(
+        [
+            EntradaTimeline(
+                usuario_id=seguidor_id,
+                viaje_compartido=compartido,
+                fecha_publicacion=compartido.fecha_publicacion,
+            )
+            for seguidor_id in seguidores.iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    # Sin recortar aquí: con muchos seguidores sería una ventana sobre todos sus timelines en
+    # cada publicación. Los que pasen de N entradas los recorta recortar_timeline.
+
+
+def incorporar_autor(seguidor_id, seguido_id):
+    # Al aceptar una solicitud entran las últimas publicaciones del seguido
+    publicaciones = (
+        ViajeCompartido.objects.filter(publicado_por_id=seguido_id)
+        .order_by("-fecha_publicacion", "-id")
+        .values_list("id", "fecha_publicacion")[:limite_timeline()]
+    )
+    EntradaTimeline.objects.bulk_create(
+        [
+            EntradaTimeline(usuario_id=seguidor_id, viaje_compartido_id=pk, fecha_publicacion=fecha)
+            for pk, fecha in publicaciones
+        ],
+        ignore_conflicts=True,
+    )
+    recortar([seguidor_id])
+
+
+def retirar_autor(seguidor_id, seguido_id):
+    EntradaTimeline.objects.filter(
+        usuario_id=seguidor_id, viaje_compartido__publicado_por_id=seguido_id
+    ).delete()
+
+
+def reconstruir(usuario_id):
+    EntradaTimeline.objects.filter(usuario_id=usuario_id).delete()
+    publicaciones = (
+        ViajeCompartido.objects.filter(
+            publicado_por__seguidores__seguidor_id=usuario_id,
+            publicado_por__seguidores__estado="aceptada",
+        )
+        .order_by("-fecha_publicacion", "-id")
+        .values_list("id", "fecha_publicacion")[:limite_timeline()]
+    )
+    return len(EntradaTimeline.objects.bulk_create([
+        EntradaTimeline(usuario_id=usuario_id, viaje_compartido_id=pk, fecha_publicacion=fecha)
+        for pk, fecha in publicaciones
+    ]))
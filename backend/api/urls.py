@@ -6,7 +6,12 @@ from .views import (
     GastoViewSet,
     obtener_perfil,
     mis_viajes,
+    mapa_viajes,
+    catalogo_viewport,
+    mapa_clusters,
+    lugares_cercanos,
     buscar_usuarios,
+    sugerencias_usuarios,
     ViajeViewSet,
     HotelViewSet,
     ActividadEnViajeViewSet,
@@ -19,8 +24,11 @@ from .views import (
     añadir_actividad_a_viaje,
     añadir_hotel_a_viaje,
     buscar_hoteles,
+    buscar_actividades_async,
+    buscar_hoteles_async,
     asociar_actividad_existente,
     asociar_hotel_existente,
+    estadisticas_cache,
 
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
@@ -55,10 +63,15 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/perfil/', obtener_perfil, name='perfil'),
     path('api/mis_viajes/', mis_viajes, name='mis_viajes'),
+    path('api/mapa/', mapa_viajes, name='mapa_viajes'),
+    path('api/catalogo/viewport/', catalogo_viewport, name='catalogo_viewport'),
+    path('api/mapa/clusters/', mapa_clusters, name='mapa_clusters'),
+    path('api/lugares/cercanos/', lugares_cercanos, name='lugares_cercanos'),
     path('api/seguir/', relacion_list, name='seguir_usuario'),
     path('api/dejar_de_seguir/<int:pk>/', relacion_destroy, name='dejar_de_seguir'),
     path('api/eliminar_seguidor/<int:pk>/', relacion_eliminar_seguidor, name='eliminar_seguidor'),
     path("api/usuarios/buscar/", buscar_usuarios, name="buscar_usuarios"),
+    path("api/usuarios/sugerencias/", sugerencias_usuarios, name="sugerencias_usuarios"),
     path('api/google-login/', GoogleLoginView.as_view(), name='google-login'),
     path('api/relacion/estado_mutuo/<int:pk>/', estado_relacion_mutua, name='estado_relacion_mutua'),
     path('api/password_reset/', PasswordResetRequestView.as_view(), name='password_reset_request'),
@@ -67,7 +80,10 @@ urlpatterns = [
     path("api/viajes/<int:viaje_id>/agregar_actividad/", añadir_actividad_a_viaje, name="agregar_actividad"),
     path("api/viajes/<int:viaje_id>/agregar_hotel/", añadir_hotel_a_viaje, name="agregar_hotel"),
     path("api/busqueda/hoteles/", buscar_hoteles, name="buscar_hoteles"),
+    path("api/busqueda/actividades/async/", buscar_actividades_async, name="buscar_actividades_async"),
+    path("api/busqueda/hoteles/async/", buscar_hoteles_async, name="buscar_hoteles_async"),
     path('api/viajes/<int:viaje_id>/asociar_actividad/', asociar_actividad_existente),
     path('api/viajes/<int:viaje_id>/asociar_hotel/', asociar_hotel_existente),
+    path('api/cache/estadisticas/', estadisticas_cache, name='estadisticas_cache'),
     
 ]
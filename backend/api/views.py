@@ -2,22 +2,30 @@ from rest_framework import viewsets, generics, status
 from .models import Actividad, CustomUser, Viaje, Hotel, ActividadEnViaje, Relacion
 from .serializers import ActividadSerializer, CustomUserSerializer, ViajeSerializer, HotelSerializer, ActividadEnViajeSerializer, RelacionSerializer, ViajeCompartidoSerializer, EstanciaHotelSerializer
 from django.contrib.auth.hashers import make_password
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from .models import ViajeCompartido, LikeViaje, EstanciaHotel, Gasto
+from .models import ViajeCompartido, LikeViaje, EstanciaHotel, Gasto, SugerenciaUsuario
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from .serializers import ViajeCompartidoSerializer, GastoSerializer
-from django.utils.timezone import now, timedelta
+from django.db import transaction
+from django.db.models import F, Value
+from rest_framework.generics import get_object_or_404
+from .pagination import PaginacionCursor
+from . import busqueda, cache, catalogo, cercanos, clusters, condicional, contadores, geo, grafo, lecturas, places, popularidad, snapshot, timeline
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
-import random, requests
+import random
 from django.core.mail import EmailMultiAlternatives
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
@@ -28,6 +36,23 @@ reset_codes = {}
 
 User = get_user_model()
 
+
+def campos_viaje(request):
+    # ?fields=a,b limita los campos del viaje y ?expand=actividades,... añade relaciones anidadas.
+    # Sin ninguno de los dos se devuelve el viaje completo, como siempre.
+    fields = [f for f in request.query_params.get("fields", "").split(",") if f]
+    expand = [e for e in request.query_params.get("expand", "").split(",") if e]
+    if not fields and not expand:
+        return None
+    simples = [f for f in ViajeSerializer.Meta.fields if f not in ViajeSerializer.RELACIONES]
+    return set(fields or simples) | set(expand)
+
+
+def relaciones_viaje(campos):
+    if campos is None:
+        return ViajeSerializer.RELACIONES
+    return [r for r in ViajeSerializer.RELACIONES if r in campos]
+
 class ActividadViewSet(viewsets.ModelViewSet):
     queryset = Actividad.objects.all()
     serializer_class = ActividadSerializer
@@ -83,26 +108,206 @@ class ViajeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
 
+    def campos(self):
+        if self.request.method != "GET":
+            return None
+        return campos_viaje(self.request)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("campos", self.campos())
+        return super().get_serializer(*args, **kwargs)
+
     def get_queryset(self):
-        return Viaje.objects.filter(usuario=self.request.user).order_by('-fecha_inicio')
+        viajes = Viaje.objects.con_detalle(relaciones_viaje(self.campos()))
+        return viajes.filter(usuario=self.request.user).order_by('-fecha_inicio')
+
+    def retrieve(self, request, *args, **kwargs):
+        # El 304 se decide con version/actualizado, sin serializar el viaje
+        viaje = get_object_or_404(
+            Viaje.objects.only("id", "version", "actualizado"), pk=kwargs["pk"], usuario=request.user
+        )
+        etag = condicional.etag_de("viaje", viaje.pk, viaje.version, condicional.variante(request))
+        no_modificado = condicional.no_modificado(request, etag, viaje.actualizado)
+        if no_modificado:
+            return no_modificado
+
+        # En caché va el viaje completo; ?fields=/?expand= se aplican sobre esa copia
+        datos = cache.respuestas.obtener(
+            cache.clave_viaje(viaje.pk),
+            lambda: ViajeSerializer(Viaje.objects.con_detalle().get(pk=viaje.pk)).data,
+            version=viaje.version,
+        )
+        campos = self.campos()
+        if campos is not None:
+            datos = {k: v for k, v in datos.items() if k in campos}
+        return condicional.con_validadores(Response(datos), etag, viaje.actualizado)
+
+    def list(self, request, *args, **kwargs):
+        # Sin Last-Modified: borrar un viaje cambia la lista pero no avanza ninguna fecha
+        versiones = Viaje.objects.filter(usuario=request.user).order_by('-fecha_inicio').values_list("id", "version")
+        etag = condicional.etag_de("viajes", list(versiones), condicional.variante(request))
+        no_modificado = condicional.no_modificado(request, etag)
+        if no_modificado:
+            return no_modificado
+        # Camino rápido de solo lectura (ver api/lecturas.py), misma salida que ViajeSerializer
+        viajes = self.filter_queryset(Viaje.objects.filter(usuario=request.user).order_by('-fecha_inicio'))
+        return condicional.con_validadores(Response(lecturas.viajes(viajes, self.campos())), etag)
     
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def buscar_usuarios(request):
     query = request.GET.get('q', '')
     if query:
-        usuarios = User.objects.filter(username__icontains=query).exclude(id=request.user.id)[:10]
+        # Ordenados por similitud, con ?pagina= y ?tamano= (ver api/busqueda.py)
+        try:
+            pagina = max(int(request.GET.get('pagina', 1)), 1)
+            tamano = min(max(int(request.GET.get('tamano', 10)), 1), 50)
+        except ValueError:
+            return Response({"error": "pagina y tamano deben ser números"}, status=400)
+        usuarios = busqueda.buscar_usuarios(query, request.user.id, pagina, tamano)
         serializer = CustomUserSerializer(usuarios, many=True)
+        if request.GET.get('con_estado') in ('1', 'true'):
+            # Mismo formato que relacion/estados/ dentro de cada resultado
+            estados = estados_relacion(request.user, [u["id"] for u in serializer.data])
+            return Response([{**u, "relacion": estados[u["id"]]} for u in serializer.data])
         return Response(serializer.data)
     return Response([])
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def mapa_viajes(request):
+    # Solo lo necesario para pintar los pines del mapa, en columnas paralelas y en una sola
+    # consulta (UNION de actividades y estancias) en vez de la lista completa de viajes.
+    versiones = Viaje.objects.filter(usuario=request.user).order_by("id").values_list("id", "version")
+    etag = condicional.etag_de("mapa", list(versiones))
+    no_modificado = condicional.no_modificado(request, etag)
+    if no_modificado:
+        return no_modificado
+
+    actividades = ActividadEnViaje.objects.filter(
+        viaje__usuario=request.user, actividad__latitud__isnull=False, actividad__longitud__isnull=False,
+    ).annotate(tipo=Value("actividad")).values_list(
+        "actividad_id", "tipo", "actividad__latitud", "actividad__longitud", "viaje_id",
+    )
+    hoteles = EstanciaHotel.objects.filter(
+        viaje__usuario=request.user, hotel__latitud__isnull=False, hotel__longitud__isnull=False,
+    ).annotate(tipo=Value("hotel")).values_list(
+        "hotel_id", "tipo", "hotel__latitud", "hotel__longitud", "viaje_id",
+    )
+
+    columnas = {"id": [], "tipo": [], "lat": [], "lng": [], "viaje": []}
+    for punto in actividades.union(hoteles):
+        for columna, valor in zip(columnas.values(), punto):
+            columna.append(valor)
+    return condicional.con_validadores(Response(columnas), etag)
+
+
+VIEWPORT_LIMITE = 200
+VIEWPORT_LIMITE_MAX = 1000
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def catalogo_viewport(request):
+    # Actividades y hoteles del catálogo compartido dentro del rectángulo visible del mapa,
+    # resuelto con el índice de celdas de api/geo.py (sin PostGIS)
+    try:
+        min_lat, max_lat, min_lng, max_lng = geo.parametros_viewport(request.query_params)
+        limite = min(int(request.query_params.get("limit", VIEWPORT_LIMITE)), VIEWPORT_LIMITE_MAX)
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "Parámetros min_lat, max_lat, min_lng, max_lng y limit no válidos"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if limite < 1:
+        return Response({"error": "limit debe ser mayor que 0"}, status=status.HTTP_400_BAD_REQUEST)
+
+    filtro = geo.filtro_viewport(min_lat, max_lat, min_lng, max_lng)
+    columnas = ("id", "nombre", "latitud", "longitud")
+    return Response({
+        "actividades": list(Actividad.objects.filter(filtro).order_by("celda", "id").values(*columnas)[:limite]),
+        "hoteles": list(Hotel.objects.filter(filtro).order_by("celda", "id").values(*columnas)[:limite]),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def mapa_clusters(request):
+    # Puntos ya agrupados para el zoom pedido (ver api/clusters.py), del catálogo completo
+    # o con ?ambito=mis_viajes solo de los viajes del usuario
+    ambito = request.query_params.get("ambito", "catalogo")
+    try:
+        min_lat, max_lat, min_lng, max_lng = geo.parametros_viewport(request.query_params)
+        zoom = int(request.query_params["zoom"])
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "Parámetros min_lat, max_lat, min_lng, max_lng y zoom no válidos"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if ambito not in ("catalogo", "mis_viajes") or not 0 <= zoom <= clusters.ZOOM_MAX:
+        return Response({"error": "ambito o zoom no válidos"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        datos = clusters.clusters(min_lat, max_lat, min_lng, max_lng, zoom, ambito, request.user)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(datos)
+
+
+CERCANOS_K = 10
+CERCANOS_K_MAX = 50
+CERCANOS_RADIO = 1000
+CERCANOS_RADIO_MAX = 50000
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def lugares_cercanos(request):
+    # Actividades y hoteles del catálogo más cercanos a un punto (k vecinos dentro de un radio
+    # en metros), resuelto con el índice en memoria de api/cercanos.py
+    try:
+        latitud = float(request.query_params["lat"])
+        longitud = float(request.query_params["lng"])
+        k = min(int(request.query_params.get("k", CERCANOS_K)), CERCANOS_K_MAX)
+        radio = min(float(request.query_params.get("radio", CERCANOS_RADIO)), CERCANOS_RADIO_MAX)
+    except (KeyError, ValueError):
+        return Response({"error": "Parámetros lat, lng, k y radio no válidos"}, status=status.HTTP_400_BAD_REQUEST)
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180) or k < 1 or radio <= 0:
+        return Response({"error": "Parámetros lat, lng, k y radio no válidos"}, status=status.HTTP_400_BAD_REQUEST)
+
+    while True:
+        resultados = cercanos.indice.buscar(latitud, longitud, k, radio)
+        nombres = {}
+        for tipo, modelo in (("actividad", Actividad), ("hotel", Hotel)):
+            ids = [r["id"] for r in resultados if r["tipo"] == tipo]
+            if ids:
+                nombres[tipo] = dict(modelo.objects.filter(id__in=ids).values_list("id", "nombre"))
+        # Borrados en otro proceso desde la última reconstrucción: se retiran del índice y se
+        # repite la búsqueda para seguir devolviendo k resultados
+        ausentes = [r for r in resultados if r["id"] not in nombres.get(r["tipo"], {})]
+        if not ausentes:
+            break
+        for r in ausentes:
+            cercanos.indice.retirar(r["tipo"], r["id"])
+    for r in resultados:
+        r["nombre"] = nombres[r["tipo"]][r["id"]]
+    return Response(resultados)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def mis_viajes(request):
-    viajes = Viaje.objects.filter(usuario=request.user).order_by('-fecha_inicio')[:2]
-    serializer = ViajeSerializer(viajes, many=True)
-    return Response(serializer.data)
+    versiones = Viaje.objects.filter(usuario=request.user).order_by('-fecha_inicio').values_list("id", "version")[:2]
+    etag = condicional.etag_de("mis_viajes", list(versiones), condicional.variante(request))
+    no_modificado = condicional.no_modificado(request, etag)
+    if no_modificado:
+        return no_modificado
+
+    campos = campos_viaje(request)
+    viajes = Viaje.objects.con_detalle(relaciones_viaje(campos)).filter(usuario=request.user).order_by('-fecha_inicio')[:2]
+    serializer = ViajeSerializer(viajes, many=True, campos=campos)
+    return condicional.con_validadores(Response(serializer.data), etag)
 
 class HotelViewSet(viewsets.ModelViewSet):
     queryset = Hotel.objects.all()
@@ -169,6 +374,47 @@ class GoogleLoginView(APIView):
 
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sugerencias_usuarios(request):
+    # Top de amigos de amigos ya calculado por calcular_sugerencias (ver api/sugerencias.py);
+    # se quitan los que el usuario ha empezado a seguir desde la última pasada
+    try:
+        limite = min(int(request.query_params.get("limit", 20)), getattr(settings, "SUGERENCIAS_TOP", 50))
+    except ValueError:
+        return Response({"error": "limit no válido"}, status=400)
+    vecinos = grafo.seguimientos.vecinos(request.user.id)
+    filas = SugerenciaUsuario.objects.filter(usuario=request.user).order_by("-comunes", "sugerido_id").values(
+        "sugerido_id", "sugerido__username", "sugerido__foto_perfil", "sugerido__bio", "comunes",
+    )
+    data = [{
+        "id": fila["sugerido_id"],
+        "username": fila["sugerido__username"],
+        "foto_perfil": fila["sugerido__foto_perfil"],
+        "bio": fila["sugerido__bio"],
+        "comunes": fila["comunes"],
+    } for fila in filas if vecinos.estado_hacia(fila["sugerido_id"]) is None]
+    return Response(data[:max(limite, 0)])
+
+
+RELACION_ESTADOS_MAX = 100
+
+
+def estados_relacion(usuario, ids):
+    # Lo mismo que relacion/<id>/estado/ y estado_relacion_mutua para varios usuarios a la vez,
+    # resuelto con la caché del grafo de seguimiento (ver api/grafo.py)
+    vecinos = grafo.seguimientos.vecinos(usuario.id)
+    estados = {}
+    for id_ in ids:
+        estado = vecinos.estado_hacia(id_)
+        estados[id_] = {
+            "estado": estado,
+            "yo_sigo": estado is not None,
+            "me_sigue": vecinos.estado_desde(id_) is not None,
+        }
+    return estados
+
+
 class RelacionViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
@@ -195,8 +441,12 @@ class RelacionViewSet(viewsets.ViewSet):
 
     def destroy(self, request, pk=None):
         try:
-            relacion = Relacion.objects.get(seguidor=request.user, seguido_id=pk)
-            relacion.delete()
+            with transaction.atomic():
+                # Bloqueada para que una aceptación a la vez no descuadre los contadores
+                relacion = Relacion.objects.select_for_update().get(seguidor=request.user, seguido_id=pk)
+                relacion.delete()
+                contadores.relacion_borrada(relacion)
+                timeline.retirar_autor(relacion.seguidor_id, relacion.seguido_id)
             return Response(status=204)
         except Relacion.DoesNotExist:
             return Response({"error": "No estás siguiendo a este usuario."}, status=404)
@@ -204,51 +454,67 @@ class RelacionViewSet(viewsets.ViewSet):
     @action(detail=True, methods=['delete'], url_path='eliminar_seguidor')
     def delete_seguidor(self, request, pk=None):
         try:
-            relacion = Relacion.objects.get(seguidor_id=pk, seguido=request.user)
-            relacion.delete()
+            with transaction.atomic():
+                relacion = Relacion.objects.select_for_update().get(seguidor_id=pk, seguido=request.user)
+                relacion.delete()
+                contadores.relacion_borrada(relacion)
+                timeline.retirar_autor(relacion.seguidor_id, relacion.seguido_id)
             return Response(status=204)
         except Relacion.DoesNotExist:
             return Response({"error": "Ese usuario no te sigue."}, status=404)
 
     @action(detail=True, methods=['get'], url_path='estado')
     def estado(self, request, pk=None):
-        siguiendo = Relacion.objects.filter(seguidor=request.user, seguido_id=pk).exists()
+        siguiendo = grafo.seguimientos.vecinos(request.user.id).estado_hacia(int(pk)) is not None
         return Response({"siguiendo": siguiendo})
 
+    @action(detail=False, methods=['get'], url_path='estados')
+    def estados(self, request):
+        # ?ids=1,2,3 -> {"1": {"estado": ..., "yo_sigo": ..., "me_sigue": ...}, ...}
+        try:
+            ids = list(dict.fromkeys(int(i) for i in request.query_params.get("ids", "").split(",") if i.strip()))
+        except ValueError:
+            return Response({"error": "ids debe ser una lista de enteros separados por comas"}, status=400)
+        if len(ids) > RELACION_ESTADOS_MAX:
+            return Response({"error": f"Como máximo {RELACION_ESTADOS_MAX} ids por petición"}, status=400)
+        return Response(estados_relacion(request.user, ids))
+
+    def _lista_usuarios(self, relaciones, lado, con_relacion=False):
+        # Un solo SELECT con JOIN a usuarios y solo las columnas que se devuelven, paginado por
+        # cursor sobre (creado, id) con los índices (seguido|seguidor, estado, creado)
+        columnas = ("id", "username", "foto_perfil", "bio")
+        query = self.request.query_params.get("q", "").strip()
+        if query:
+            # UPPER(username) LIKE '%q%': en Postgres lo sirve el índice de trigramas de 0023
+            relaciones = relaciones.filter(**{f"{lado}__username__icontains": query})
+        filas = relaciones.values("id", "creado", *(f"{lado}__{c}" for c in columnas))
+        paginador = PaginacionCursor(("creado", "id"))
+        pagina = paginador.paginate_queryset(filas, request=self.request, view=self)
+        data = [
+            {**({"relacion_id": fila["id"]} if con_relacion else {}), **{c: fila[f"{lado}__{c}"] for c in columnas}}
+            for fila in pagina
+        ]
+        if self.request.query_params.get("con_estado") in ("1", "true"):
+            # Mismo formato que relacion/estados/ dentro de cada usuario de la página
+            estados = estados_relacion(self.request.user, [u["id"] for u in data])
+            data = [{**u, "relacion": estados[u["id"]]} for u in data]
+        return paginador.get_paginated_response(data)
+
     @action(detail=False, methods=['get'], url_path='seguimientos')
     def seguidos(self, request):
         relaciones = Relacion.objects.filter(seguidor=request.user, estado="aceptada")
-        data = [{
-            "id": r.seguido.id,
-            "username": r.seguido.username,
-            "foto_perfil": r.seguido.foto_perfil,
-            "bio": r.seguido.bio,
-        } for r in relaciones]
-        return Response(data)
+        return self._lista_usuarios(relaciones, "seguido")
 
 
     @action(detail=False, methods=['get'], url_path='seguidores')
     def seguidores(self, request):
         relaciones = Relacion.objects.filter(seguido=request.user, estado="aceptada")
-        data = [{
-            "id": r.seguidor.id,
-            "username": r.seguidor.username,
-            "foto_perfil": r.seguidor.foto_perfil,
-            "bio": r.seguidor.bio,
-        } for r in relaciones]
-        return Response(data)
+        return self._lista_usuarios(relaciones, "seguidor")
     
     @action(detail=False, methods=["get"], url_path="solicitudes")
     def solicitudes_pendientes(self, request):
         solicitudes = Relacion.objects.filter(seguido=request.user, estado="pendiente")
-        data = [{
-            "relacion_id": r.id, 
-            "id": r.seguidor.id,
-            "username": r.seguidor.username,
-            "foto_perfil": r.seguidor.foto_perfil,
-            "bio": r.seguidor.bio,
-        } for r in solicitudes]
-        return Response(data)
+        return self._lista_usuarios(solicitudes, "seguidor", con_relacion=True)
 
     @action(detail=True, methods=['get'], url_path='info')
     def info_usuario(self, request, pk=None):
@@ -261,19 +527,21 @@ class RelacionViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], url_path='contador')
     def contador(self, request):
-        seguidores = Relacion.objects.filter(seguido=request.user, estado="aceptada").count()
-        siguiendo = Relacion.objects.filter(seguidor=request.user, estado="aceptada").count()
+        # Columnas desnormalizadas (ver api/contadores.py) en vez de dos COUNT sobre Relacion
         return Response({
-            "siguiendo": siguiendo,
-            "seguidores": seguidores
+            "siguiendo": request.user.siguiendo_count,
+            "seguidores": request.user.seguidores_count
         })
     
     @action(detail=True, methods=["post"], url_path="aceptar")
     def aceptar_solicitud(self, request, pk=None):
         try:
-            relacion = Relacion.objects.get(id=pk, seguido=request.user, estado="pendiente")
-            relacion.estado = "aceptada"
-            relacion.save()
+            with transaction.atomic():
+                relacion = Relacion.objects.select_for_update().get(id=pk, seguido=request.user, estado="pendiente")
+                relacion.estado = "aceptada"
+                relacion.save()
+                contadores.relacion_aceptada(relacion)
+                timeline.incorporar_autor(relacion.seguidor_id, relacion.seguido_id)
             return Response({"mensaje": "Solicitud aceptada"}, status=200)
         except Relacion.DoesNotExist:
             return Response({"error": "Solicitud no encontrada o ya procesada"}, status=404)
@@ -281,9 +549,8 @@ class RelacionViewSet(viewsets.ViewSet):
     @action(detail=True, methods=["get"], url_path="estado")
     def estado(self, request, pk=None):
         try:
-            relacion = Relacion.objects.get(seguidor=request.user, seguido_id=pk)
-            return Response({"estado": relacion.estado})
-        except Relacion.DoesNotExist:
+            return Response({"estado": grafo.seguimientos.vecinos(request.user.id).estado_hacia(int(pk))})
+        except ValueError:
             return Response({"estado": None})
     
 
@@ -293,37 +560,63 @@ class ViajeCompartidoViewSet(viewsets.ModelViewSet):
     serializer_class = ViajeCompartidoSerializer
 
     def get_queryset(self):
-        queryset = ViajeCompartido.objects.all()
+        queryset = ViajeCompartido.objects.para_feed(self.request.user)
         publicado_por = self.request.query_params.get("publicado_por")
         if publicado_por:
             queryset = queryset.filter(publicado_por_id=publicado_por)
         return queryset
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["campos_viaje"] = campos_viaje(self.request)
+        return context
+
+    def retrieve(self, request, pk=None):
+        # ya_dado_like depende de quien pregunta: se guarda todo lo demás y se añade aparte
+        def construir():
+            compartido = get_object_or_404(ViajeCompartido.objects.para_feed(request.user), pk=pk)
+            datos = dict(ViajeCompartidoSerializer(compartido, context={"request": request}).data)
+            datos.pop("ya_dado_like")
+            return datos
+
+        # Con la versión: lo que se construya mientras otra petición invalida no se queda en caché
+        compartido = get_object_or_404(ViajeCompartido.objects.only("id", "version"), pk=pk)
+        datos = dict(cache.respuestas.obtener(cache.clave_compartido(pk), construir, version=compartido.version))
+        campos = campos_viaje(request)
+        if campos is not None:
+            datos["viaje"] = {k: v for k, v in datos["viaje"].items() if k in campos}
+        datos["ya_dado_like"] = LikeViaje.objects.filter(usuario=request.user, viaje_compartido_id=pk).exists()
+        return Response(datos)
+
+    def _paginar(self, viajes, campos=("fecha_publicacion", "id")):
+        # Camino rápido de solo lectura (ver api/lecturas.py), misma salida que ViajeCompartidoSerializer
+        paginador = PaginacionCursor(campos)
+        extra = [c for c in campos if c not in lecturas.COMPARTIDO_COLUMNAS]
+        pagina = paginador.paginate_queryset(lecturas.filas_compartidos(viajes, extra), self.request, view=self)
+        return paginador.get_paginated_response(lecturas.compartidos(pagina, campos_viaje(self.request)))
+
     def list(self, request):
         viajes = self.get_queryset()  
-        serializer = ViajeCompartidoSerializer(viajes, many=True, context={"request": request})
-        return Response(serializer.data)
+        return self._paginar(viajes)
 
     @action(detail=False, methods=["get"])
     def siguiendo(self, request):
-        seguidos_ids = Relacion.objects.filter(seguidor=request.user).values_list("seguido_id", flat=True)
-        viajes = ViajeCompartido.objects.filter(publicado_por__in=seguidos_ids)
-        serializer = ViajeCompartidoSerializer(viajes, many=True, context={"request": request})
-        return Response(serializer.data)
+        # Lee el timeline precalculado (ver api/timeline.py) en vez de cruzar Relacion en cada petición
+        viajes = ViajeCompartido.objects.para_feed(request.user).filter(
+            entradas_timeline__usuario=request.user
+        ).annotate(fecha_timeline=F("entradas_timeline__fecha_publicacion"))
+        return self._paginar(viajes, campos=("fecha_timeline", "id"))
 
     @action(detail=False, methods=["get"])
     def populares(self, request):
-        desde = now() - timedelta(days=30)
-        viajes = ViajeCompartido.objects.filter(fecha_publicacion__gte=desde)
-        viajes = sorted(viajes, key=lambda v: v.likes.count(), reverse=True)
-        serializer = ViajeCompartidoSerializer(viajes, many=True, context={"request": request})
-        return Response(serializer.data)
+        # Score precalculado con decaimiento temporal (ver api/popularidad.py)
+        viajes = ViajeCompartido.objects.para_feed(request.user)
+        return self._paginar(viajes, campos=("score", "id"))
 
     @action(detail=False, methods=["get"])
     def recientes(self, request):
-        viajes = ViajeCompartido.objects.all().order_by("-fecha_publicacion")
-        serializer = ViajeCompartidoSerializer(viajes, many=True, context={"request": request})
-        return Response(serializer.data)
+        viajes = ViajeCompartido.objects.para_feed(request.user)
+        return self._paginar(viajes)
 
     @action(detail=True, methods=["post"])
     def publicar(self, request, pk=None):
@@ -332,7 +625,13 @@ class ViajeCompartidoViewSet(viewsets.ModelViewSet):
             if hasattr(viaje, 'compartido'):
                 return Response({"error": "Ya está publicado"}, status=400)
             comentario = request.data.get("comentario", "")
-            compartido = ViajeCompartido.objects.create(viaje=viaje, comentario=comentario, publicado_por=request.user)
+            with transaction.atomic():
+                compartido = ViajeCompartido.objects.create(
+                    viaje=viaje, comentario=comentario, publicado_por=request.user,
+                    snapshot=snapshot.generar(viaje),
+                )
+                popularidad.puntuar(compartido)
+                timeline.repartir_publicacion(compartido)
             return Response(ViajeCompartidoSerializer(compartido, context={'request': request}).data)
         except Viaje.DoesNotExist:
             return Response({"error": "Viaje no encontrado"}, status=404)
@@ -350,7 +649,11 @@ class ViajeCompartidoViewSet(viewsets.ModelViewSet):
     def like(self, request, pk=None):
         try:
             viaje = ViajeCompartido.objects.get(pk=pk)
-            LikeViaje.objects.get_or_create(usuario=request.user, viaje_compartido=viaje)
+            with transaction.atomic():
+                _, creado = LikeViaje.objects.get_or_create(usuario=request.user, viaje_compartido=viaje)
+                if creado:
+                    ViajeCompartido.objects.filter(pk=viaje.pk).update(likes_count=F("likes_count") + 1, version=F("version") + 1)
+            cache.respuestas.invalidar(cache.clave_compartido(viaje.pk))
             return Response({"mensaje": "Like registrado"})
         except ViajeCompartido.DoesNotExist:
             return Response({"error": "Viaje no encontrado"}, status=404)
@@ -359,7 +662,11 @@ class ViajeCompartidoViewSet(viewsets.ModelViewSet):
     def unlike(self, request, pk=None):
         try:
             viaje = ViajeCompartido.objects.get(pk=pk)
-            LikeViaje.objects.filter(usuario=request.user, viaje_compartido=viaje).delete()
+            with transaction.atomic():
+                borrados, _ = LikeViaje.objects.filter(usuario=request.user, viaje_compartido=viaje).delete()
+                if borrados:
+                    ViajeCompartido.objects.filter(pk=viaje.pk).update(likes_count=F("likes_count") - 1, version=F("version") + 1)
+            cache.respuestas.invalidar(cache.clave_compartido(viaje.pk))
             return Response({"mensaje": "Like eliminado"})
         except ViajeCompartido.DoesNotExist:
             return Response({"error": "Viaje no encontrado"}, status=404)
@@ -372,8 +679,9 @@ class ViajeCompartidoViewSet(viewsets.ModelViewSet):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def estado_relacion_mutua(request, pk):
-     yo_sigo = Relacion.objects.filter(seguidor=request.user, seguido_id=pk).exists()
-     me_sigue = Relacion.objects.filter(seguidor_id=pk, seguido=request.user).exists()
+     vecinos = grafo.seguimientos.vecinos(request.user.id)
+     yo_sigo = vecinos.estado_hacia(pk) is not None
+     me_sigue = vecinos.estado_desde(pk) is not None
      return Response({
         "yo_sigo": yo_sigo,
         "me_sigue": me_sigue
@@ -471,30 +779,9 @@ def buscar_actividades(request):
     if not query:
         return Response({"error": "Falta el término de búsqueda"}, status=400)
 
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query": query,
-        "language": "es",
-        "key": settings.GOOGLE_API_KEY,
-    }
-
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, params=params, headers=headers)
-        data = r.json()
-
-        resultados = []
-        for lugar in data.get("results", []):
-            resultados.append({
-                "nombre": lugar.get("name"),
-                "direccion": lugar.get("formatted_address"),
-                "latitud": lugar["geometry"]["location"]["lat"],
-                "longitud": lugar["geometry"]["location"]["lng"],
-                "foto": f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={lugar['photos'][0]['photo_reference']}&key={settings.GOOGLE_API_KEY}" if "photos" in lugar else None,
-                "place_id": lugar.get("place_id"),
-            })
-
-        return Response(resultados)
+        # Primero el catálogo propio y, si no basta, Google Places con caché (ver api/catalogo.py)
+        return Response(catalogo.buscar_lugares(Actividad, query))
 
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -533,6 +820,7 @@ def añadir_actividad_a_viaje(request, viaje_id):
             longitud=longitud,
             google_place_id=place_id
         )
+        cercanos.indice.añadir("actividad", actividad.id, latitud, longitud)
 
     try:
         viaje = Viaje.objects.get(id=viaje_id, usuario=request.user)
@@ -553,30 +841,9 @@ def buscar_hoteles(request):
     if not query:
         return Response({"error": "Falta el término de búsqueda"}, status=400)
 
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-    params = {
-        "query": query,
-        "language": "es",
-        "key": settings.GOOGLE_API_KEY,
-    }
-
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, params=params, headers=headers)
-        data = r.json()
-
-        resultados = []
-        for lugar in data.get("results", []):
-            resultados.append({
-                "nombre": lugar.get("name"),
-                "direccion": lugar.get("formatted_address"),
-                "latitud": lugar["geometry"]["location"]["lat"],
-                "longitud": lugar["geometry"]["location"]["lng"],
-                "foto": f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={lugar['photos'][0]['photo_reference']}&key={settings.GOOGLE_API_KEY}" if "photos" in lugar else None,
-                "place_id": lugar.get("place_id"),
-            })
-
-        return Response(resultados)
+        # Primero el catálogo propio y, si no basta, Google Places con caché (ver api/catalogo.py)
+        return Response(catalogo.buscar_lugares(Hotel, query))
 
     except Exception as e:
         return Response({"error": str(e)}, status=500)
@@ -584,6 +851,40 @@ def buscar_hoteles(request):
 
     
 
+async def usuario_jwt(request):
+    # DRF no tiene vistas async: se autentica con la misma clase JWT que el resto de la API
+    try:
+        autenticado = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    return autenticado[0] if autenticado else None
+
+
+async def buscar_lugares_async(request, modelo):
+    # Variante ASGI de buscar_actividades/buscar_hoteles: la espera a Google no ocupa un hilo
+    if await usuario_jwt(request) is None:
+        return JsonResponse({"detail": "Las credenciales de autenticación no se proveyeron."}, status=401)
+
+    query = request.GET.get("q", "")
+    if not query:
+        return JsonResponse({"error": "Falta el término de búsqueda"}, status=400)
+
+    try:
+        return JsonResponse(await catalogo.abuscar_lugares(modelo, query), safe=False)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@require_GET
+async def buscar_actividades_async(request):
+    return await buscar_lugares_async(request, Actividad)
+
+
+@require_GET
+async def buscar_hoteles_async(request):
+    return await buscar_lugares_async(request, Hotel)
+
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -618,6 +919,7 @@ def añadir_hotel_a_viaje(request, viaje_id):
             longitud=longitud,
             google_place_id=place_id
         )
+        cercanos.indice.añadir("hotel", hotel.id, latitud, longitud)
 
     try:
         viaje = Viaje.objects.get(id=viaje_id, usuario=request.user)
@@ -696,9 +998,35 @@ class GastoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Gasto.objects.filter(viaje__usuario=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        # Los gastos suben la versión de su viaje, así que basta con la de los viajes afectados
+        viajes = Viaje.objects.filter(usuario=request.user)
+        viaje_id = request.query_params.get("viaje")
+        if viaje_id:
+            viajes = viajes.filter(pk=viaje_id) if viaje_id.isdigit() else viajes.none()
+        versiones = list(viajes.order_by("id").values_list("id", "version", "actualizado"))
+        etag = condicional.etag_de("gastos", [v[:2] for v in versiones], condicional.variante(request))
+        ultima = max((v[2] for v in versiones), default=None) if viaje_id else None
+        no_modificado = condicional.no_modificado(request, etag, ultima)
+        if no_modificado:
+            return no_modificado
+        datos = lecturas.gastos(self.filter_queryset(self.get_queryset()))
+        return condicional.con_validadores(Response(datos), etag, ultima)
+
 
 
 
     
 
 
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def estadisticas_cache(request):
+    # Contadores de este proceso
+    return Response({
+        "respuestas": cache.respuestas.estadisticas(),
+        "grafo": grafo.seguimientos.estadisticas(),
+        "places": places.lugares.estadisticas(),
+    })
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
      'corsheaders',
      'rest_framework',
       'rest_framework_simplejwt',
@@ -101,6 +102,21 @@ DATABASES = {
     }
 }
 
+# Caché (por defecto en memoria del proceso; se puede cambiar por Redis/Memcached sin tocar código).
+# Con varios workers hace falta una compartida: ver GRAFO_TTL_LOCAL y manage.py check --deploy.
+# LocMemCache guarda 300 entradas si no se indica otra cosa, pocas para los clusters y el grafo.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tfg',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+}
+
+# Caché de respuestas serializadas del detalle de viajes (ver api/cache.py)
+CACHE_RESPUESTAS_ALIAS = 'default'
+CACHE_RESPUESTAS_TIMEOUT = 600
+
 # Configuración de REST Framework con JWT
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -108,9 +124,67 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    # orjson en vez del encoder JSON de la librería estándar (misma salida)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Paginación por cursor de los feeds de viajes compartidos (?page_size= hasta el máximo)
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+# Máximo de entradas que se guardan en el timeline "siguiendo" de cada usuario. Al publicar no se
+# recorta: lo hace el worker "manage.py recortar_timeline --intervalo N".
+TIMELINE_MAX_ENTRADAS = 500
+
+# Ranking de populares: segundos de novedad que equivalen a multiplicar los likes por 10
+SCORE_SEGUNDOS_POR_ORDEN = 45000
+
+# Clusters del mapa por tesela (ver api/clusters.py): caducidad en caché y teselas por petición
+CLUSTERS_TIMEOUT = 3600
+CLUSTERS_MAX_TESELAS = 64
+
+# Índice en memoria de lugares cercanos (ver api/cercanos.py): segundos entre reconstrucciones
+# completas y entre lecturas de los lugares creados desde otros procesos
+CERCANOS_TTL = 3600
+CERCANOS_REFRESCO = 60
+
+# Caché del grafo de seguimiento (ver api/grafo.py): usuarios en memoria por proceso y
+# caducidad de las entradas compartidas en la caché de Django. Si la caché es local a cada proceso,
+# las versiones caducan a los GRAFO_TTL_LOCAL segundos para recoger los cambios de otros workers.
+GRAFO_LRU_MAX = 10000
+GRAFO_TIMEOUT = 3600
+GRAFO_TTL_LOCAL = 30
+
+# Sugerencias de amigos de amigos que se guardan por usuario (ver api/sugerencias.py)
+SUGERENCIAS_TOP = 50
+
+# Segundos entre reconstrucciones del índice de búsqueda de usuarios en memoria, que solo se
+# usa cuando la base de datos no es Postgres (ver api/busqueda.py)
+BUSQUEDA_TTL = 300
+
+# Caché de búsquedas en Google Places (ver api/places.py). PLACES_CLIENTE puede apuntar a
+# api.places.ClienteFalso para trabajar sin red ni gastar cuota.
+PLACES_CLIENTE = os.getenv('PLACES_CLIENTE', 'api.places.ClienteGoogle')
+PLACES_CACHE_TTL = 7 * 24 * 3600
+PLACES_CACHE_MAX_FILAS = 50000
+PLACES_LRU_MAX = 1000
+PLACES_PURGA_CADA = 100
+# Cliente HTTP de Google Places: timeout (conexión, lectura), reintentos de 5xx y conexiones por proceso
+PLACES_TIMEOUT = (3.05, 10)
+PLACES_REINTENTOS = 2
+PLACES_POOL = 10
+# Peticiones a Google en vuelo por proceso desde las vistas async; las demás esperan turno
+PLACES_ASYNC_CONCURRENCIA = 100
+
+# Búsqueda de lugares en el catálogo propio (api/catalogo.py): con CATALOGO_MINIMO resultados
+# locales no se consulta Google; CATALOGO_LIMITE resultados como mucho
+CATALOGO_MINIMO = 5
+CATALOGO_LIMITE = 20
+
 # Configuración de Simple JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Token válido por 1 día
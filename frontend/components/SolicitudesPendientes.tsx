@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react"
+import React, { useEffect, useRef, useState } from "react"
 import {
   View,
   Text,
@@ -14,6 +14,7 @@ import {
 } from "react-native"
 import AsyncStorage from "@react-native-async-storage/async-storage"
 import api from "../services/api"
+import { obtenerPagina } from "../services/paginacion"
 import { Ionicons } from "@expo/vector-icons"
 import { useNavigation } from "@react-navigation/native"
 
@@ -32,17 +33,21 @@ const SolicitudesPendientes = () => {
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
   const [processingIds, setProcessingIds] = useState<number[]>([])
+  const [cursor, setCursor] = useState<string | null>(null)
+  const cargandoMas = useRef(false)
   const navigation = useNavigation()
 
   const fetchSolicitudes = async () => {
     setLoading(true)
     try {
       const token = await AsyncStorage.getItem("access_token")
-      const res = await api.get("relacion/solicitudes/", {
+      // Primera página; el resto se pide al llegar al final de la lista
+      const pagina = await obtenerPagina("relacion/solicitudes/", null, {
         headers: { Authorization: `Bearer ${token}` },
       })
 
-      setSolicitudes(res.data)
+      setSolicitudes(pagina.resultados)
+      setCursor(pagina.cursor)
     } catch (error) {
       Alert.alert("Error", "No se pudieron cargar las solicitudes")
     } finally {
@@ -51,6 +56,23 @@ const SolicitudesPendientes = () => {
     }
   }
 
+  const cargarMas = async () => {
+    if (!cursor || cargandoMas.current) return
+    cargandoMas.current = true
+    try {
+      const token = await AsyncStorage.getItem("access_token")
+      const pagina = await obtenerPagina("relacion/solicitudes/", cursor, {
+        headers: { Authorization: `Bearer ${token}` },
+      })
+      setSolicitudes(prev => [...prev, ...pagina.resultados])
+      setCursor(pagina.cursor)
+    } catch (error) {
+      console.error("Error al cargar más solicitudes:", error)
+    } finally {
+      cargandoMas.current = false
+    }
+  }
+
   const aceptarSolicitud = async (relacionId: number) => {
   setProcessingIds(prev => [...prev, relacionId])
   try {
@@ -116,6 +138,8 @@ const SolicitudesPendientes = () => {
           data={solicitudes}
           keyExtractor={(item) => item.relacion_id?.toString() ?? item.id.toString()}
           renderItem={renderItem}
+          onEndReached={cargarMas}
+          onEndReachedThreshold={0.5}
           refreshControl={<RefreshControl refreshing={refreshing} onRefresh={fetchSolicitudes} />}
           ListEmptyComponent={<Text style={styles.empty}>No tienes solicitudes pendientes</Text>}
         />
@@ -18,6 +18,7 @@ import {
 } from "react-native"
 import AsyncStorage from "@react-native-async-storage/async-storage"
 import api from "../services/api"
+import { obtenerPagina } from "../services/paginacion"
 import { useRoute, useNavigation } from "@react-navigation/native"
 import { Ionicons } from "@expo/vector-icons"
 
@@ -38,7 +39,7 @@ const ListaUsuarios = () => {
   const { modo } = route.params as { modo: "seguidores" | "siguiendo" }
 
   const [usuarios, setUsuarios] = useState<Usuario[]>([])
-  const [filteredUsuarios, setFilteredUsuarios] = useState<Usuario[]>([])
+  const [cursor, setCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
   const [searchQuery, setSearchQuery] = useState("")
@@ -49,9 +50,27 @@ const ListaUsuarios = () => {
   const fadeAnim = useRef(new Animated.Value(0)).current
   const slideAnim = useRef(new Animated.Value(50)).current
 
-  const fetchUsuarios = async (showLoading = true) => {
+  const cargandoMas = useRef(false)
+  // Búsqueda de la última petición: las respuestas de búsquedas anteriores se descartan
+  const busquedaActual = useRef("")
+  const esperaBusqueda = useRef<ReturnType<typeof setTimeout> | null>(null)
+
+  // Una página de la lista, filtrada en el servidor por ?q= y con el estado de la relación
+  // de cada usuario incluido (con_estado)
+  const cargarPagina = async (token: string, cursorPagina: string | null, busqueda: string) => {
+    const endpoint = modo === "seguidores" ? "relacion/seguidores/" : "relacion/seguimientos/"
+    const pagina = await obtenerPagina(endpoint, cursorPagina, {
+      headers: { Authorization: `Bearer ${token}` },
+      params: { con_estado: 1, ...(busqueda.trim() ? { q: busqueda.trim() } : {}) },
+    })
+    const usuariosData: Usuario[] = pagina.resultados.map((u: any) => ({ ...u, estado: u.relacion?.estado ?? null }))
+    return { usuariosData, cursor: pagina.cursor }
+  }
+
+  const fetchUsuarios = async (showLoading = true, busqueda = searchQuery) => {
     if (showLoading) setLoading(true)
     setError(null)
+    busquedaActual.current = busqueda
 
     try {
       const token = await AsyncStorage.getItem("access_token")
@@ -60,27 +79,11 @@ const ListaUsuarios = () => {
         return
       }
 
-      const endpoint = modo === "seguidores" ? "relacion/seguidores/" : "relacion/seguimientos/"
-      const res = await api.get(endpoint, {
-        headers: { Authorization: `Bearer ${token}` },
-      })
-
-      const usuariosData: Usuario[] = await Promise.all(
-        res.data.map(async (u: any) => {
-          try {
-            const estado = await api.get(`relacion/${u.id}/estado/`, {
-              headers: { Authorization: `Bearer ${token}` },
-            })
-            return { ...u, estado: estado.data.estado as "pendiente" | "aceptada" | null }
-          } catch {
-            return { ...u, estado: null }
-          }
-        })
-      )
-
+      const pagina = await cargarPagina(token, null, busqueda)
+      if (busquedaActual.current !== busqueda) return
 
-      setUsuarios(usuariosData)
-      setFilteredUsuarios(usuariosData)
+      setUsuarios(pagina.usuariosData)
+      setCursor(pagina.cursor)
 
       
       Animated.parallel([
@@ -104,10 +107,26 @@ const ListaUsuarios = () => {
     }
   }
 
+  const cargarMas = async () => {
+    if (!cursor || cargandoMas.current) return
+    cargandoMas.current = true
+    const busqueda = busquedaActual.current
+    try {
+      const token = await AsyncStorage.getItem("access_token")
+      if (!token) return
+      const pagina = await cargarPagina(token, cursor, busqueda)
+      if (busquedaActual.current !== busqueda) return
+      setUsuarios((anteriores) => [...anteriores, ...pagina.usuariosData])
+      setCursor(pagina.cursor)
+    } catch (error) {
+      console.error("Error al cargar más usuarios:", error)
+    } finally {
+      cargandoMas.current = false
+    }
+  }
+
   const actualizarEstado = (id: number, estado: "pendiente" | "aceptada" | null) => {
-      const update = (list: Usuario[]) => list.map(u => u.id === id ? { ...u, estado } : u)
-      setUsuarios(update)
-      setFilteredUsuarios(update)
+      setUsuarios(list => list.map(u => u.id === id ? { ...u, estado } : u))
     }
 
 
@@ -153,9 +172,7 @@ const ListaUsuarios = () => {
             })
 
             // borramos al usuaario de las listas
-            const filterUser = (list: Usuario[]) => list.filter((u) => u.id !== usuario.id)
-            setUsuarios(filterUser)
-            setFilteredUsuarios(filterUser)
+            setUsuarios((list) => list.filter((u) => u.id !== usuario.id))
           } catch (err) {
             console.error("Error al quitar seguidor:", err)
             Alert.alert("Error", "No se pudo quitar al seguidor")
@@ -170,12 +187,9 @@ const ListaUsuarios = () => {
   const handleSearch = (text: string) => {
     setSearchQuery(text)
 
-    if (text.trim() === "") {
-      setFilteredUsuarios(usuarios)
-    } else {
-      const filtered = usuarios.filter((user) => user.username.toLowerCase().includes(text.toLowerCase()))
-      setFilteredUsuarios(filtered)
-    }
+    // El filtro va al servidor; se espera a que se deje de escribir
+    if (esperaBusqueda.current) clearTimeout(esperaBusqueda.current)
+    esperaBusqueda.current = setTimeout(() => fetchUsuarios(false, text), 300)
   }
 
   const onRefresh = () => {
@@ -189,6 +203,9 @@ const ListaUsuarios = () => {
 
   useEffect(() => {
     fetchUsuarios()
+    return () => {
+      if (esperaBusqueda.current) clearTimeout(esperaBusqueda.current)
+    }
   }, [modo])
 
   const renderEmptyState = () => {
@@ -205,7 +222,7 @@ const ListaUsuarios = () => {
       )
     }
 
-    if (searchQuery && filteredUsuarios.length === 0) {
+    if (searchQuery && usuarios.length === 0) {
       return (
         <View style={styles.emptyContainer}>
           <Ionicons name="search-outline" size={80} color="#ccc" />
@@ -337,9 +354,11 @@ const ListaUsuarios = () => {
         </View>
       ) : (
         <FlatList
-          data={filteredUsuarios}
+          data={usuarios}
           keyExtractor={(item) => item.id.toString()}
           renderItem={renderItem}
+          onEndReached={cargarMas}
+          onEndReachedThreshold={0.5}
           contentContainerStyle={styles.listContent}
           showsVerticalScrollIndicator={false}
           ListEmptyComponent={renderEmptyState}
@@ -67,7 +67,7 @@ const PantallaPerfil = ({ navigation }: any) => {
 
       const [perfilRes, viajesRes, relacionRes] = await Promise.all([
         api.get("perfil/", { headers: { Authorization: `Bearer ${token}` } }),
-        api.get("mis_viajes/", { headers: { Authorization: `Bearer ${token}` } }),
+        api.get("mis_viajes/?fields=id,nombre,ciudad,fecha_inicio,fecha_fin,imagen_destacada&expand=actividades", { headers: { Authorization: `Bearer ${token}` } }),
         api.get("relacion/contador/", { headers: { Authorization: `Bearer ${token}` } }),
       ])
 
@@ -1,19 +1,20 @@
 // Archivo: PantallaPerfilUsuario.tsx
 
-import React, { useEffect, useState } from "react"
+import React, { useEffect, useRef, useState } from "react"
 import {
   View,
   Text,
   StyleSheet,
   Image,
   TouchableOpacity,
-  ScrollView,
+  FlatList,
   ActivityIndicator,
   StatusBar,
   Platform,
 } from "react-native"
 import AsyncStorage from "@react-native-async-storage/async-storage"
 import api from "../services/api"
+import { obtenerPagina } from "../services/paginacion"
 import { useRoute, useNavigation } from "@react-navigation/native"
 import { Ionicons } from "@expo/vector-icons"
 
@@ -26,6 +27,8 @@ const PantallaPerfilUsuario = () => {
 
   const [usuario, setUsuario] = useState<any>(null)
   const [viajes, setViajes] = useState<any[]>([])
+  const [cursor, setCursor] = useState<string | null>(null)
+  const cargandoMas = useRef(false)
   const [cargando, setCargando] = useState(true)
   const [estadoRelacion, setEstadoRelacion] = useState<"pendiente" | "aceptada" | null>(null)
   const [procesando, setProcesando] = useState(false)
@@ -39,12 +42,14 @@ const PantallaPerfilUsuario = () => {
       const [info, estado, compartidos] = await Promise.all([
         api.get(`relacion/${id}/info/`, { headers }),
         api.get(`relacion/${id}/estado/`, { headers }),
-        api.get(`viaje_compartido/?publicado_por=${id}`, { headers }),
+        // Primera página; el resto se pide al llegar al final de la lista
+        obtenerPagina("viaje_compartido/", null, { headers, params: { publicado_por: id } }),
       ])
 
       setUsuario(info.data)
       setEstadoRelacion(estado.data.estado)
-      setViajes(compartidos.data)
+      setViajes(compartidos.resultados)
+      setCursor(compartidos.cursor)
     } catch (error) {
       console.error("Error al cargar perfil de otro usuario:", error)
     } finally {
@@ -52,6 +57,24 @@ const PantallaPerfilUsuario = () => {
     }
   }
 
+  const cargarMas = async () => {
+    if (!cursor || cargandoMas.current) return
+    cargandoMas.current = true
+    try {
+      const token = await AsyncStorage.getItem("access_token")
+      const pagina = await obtenerPagina("viaje_compartido/", cursor, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { publicado_por: id },
+      })
+      setViajes((anteriores) => [...anteriores, ...pagina.resultados])
+      setCursor(pagina.cursor)
+    } catch (error) {
+      console.error("Error al cargar más viajes:", error)
+    } finally {
+      cargandoMas.current = false
+    }
+  }
+
   const toggleSeguir = async () => {
   setProcesando(true)
   try {
@@ -86,77 +109,81 @@ const PantallaPerfilUsuario = () => {
   }
 
   return (
-    <ScrollView style={styles.container}>
-      <StatusBar barStyle="dark-content" backgroundColor="#fff" />
+    <FlatList
+      style={styles.container}
+      data={viajes}
+      keyExtractor={(viaje) => viaje.id.toString()}
+      onEndReached={cargarMas}
+      onEndReachedThreshold={0.5}
+      ListHeaderComponent={
+        <>
+          <StatusBar barStyle="dark-content" backgroundColor="#fff" />
 
-      <View style={styles.header}>
-        <TouchableOpacity onPress={() => navigation.goBack()}>
-          <Ionicons name="chevron-back" size={28} color="#333" />
-        </TouchableOpacity>
-        <Text style={styles.title}>{usuario.username}</Text>
-        <View style={{ width: 28 }} />
-      </View>
+          <View style={styles.header}>
+            <TouchableOpacity onPress={() => navigation.goBack()}>
+              <Ionicons name="chevron-back" size={28} color="#333" />
+            </TouchableOpacity>
+            <Text style={styles.title}>{usuario.username}</Text>
+            <View style={{ width: 28 }} />
+          </View>
 
-      <View style={styles.profileSection}>
-        <Image
-          source={usuario.foto_perfil ? { uri: usuario.foto_perfil } : avatarPorDefecto}
-          style={styles.avatar}
-        />
-        <Text style={styles.username}>{usuario.username}</Text>
+          <View style={styles.profileSection}>
+            <Image
+              source={usuario.foto_perfil ? { uri: usuario.foto_perfil } : avatarPorDefecto}
+              style={styles.avatar}
+            />
+            <Text style={styles.username}>{usuario.username}</Text>
       
-        {/* <Text style={styles.email}>{usuario.email}</Text> */}
+            {/* <Text style={styles.email}>{usuario.email}</Text> */}
 
-        {usuario.bio ? <Text style={styles.bio}>{usuario.bio}</Text> : null}
-        {usuario.ubicacion ? <Text style={styles.location}>{usuario.ubicacion}</Text> : null}
+            {usuario.bio ? <Text style={styles.bio}>{usuario.bio}</Text> : null}
+            {usuario.ubicacion ? <Text style={styles.location}>{usuario.ubicacion}</Text> : null}
 
-        <TouchableOpacity
-          style={[
-            styles.followButton,
-            estadoRelacion === "aceptada" ? styles.following : styles.notFollowing
-          ]}
-          onPress={toggleSeguir}
-          disabled={procesando || estadoRelacion === "pendiente"}
-        >
-          {procesando ? (
-            <ActivityIndicator size="small" color={estadoRelacion === "aceptada" ? "#fff" : "#007AFF"} />
-          ) : (
-            <Text
+            <TouchableOpacity
               style={[
-                styles.followText,
-                estadoRelacion === "aceptada" ? styles.whiteText : styles.blueText
+                styles.followButton,
+                estadoRelacion === "aceptada" ? styles.following : styles.notFollowing
               ]}
+              onPress={toggleSeguir}
+              disabled={procesando || estadoRelacion === "pendiente"}
             >
-              {estadoRelacion === "pendiente"
-                ? "Pendiente"
-                : estadoRelacion === "aceptada"
-                ? "Siguiendo"
-                : "Seguir"}
-            </Text>
-          )}
-        </TouchableOpacity>
+              {procesando ? (
+                <ActivityIndicator size="small" color={estadoRelacion === "aceptada" ? "#fff" : "#007AFF"} />
+              ) : (
+                <Text
+                  style={[
+                    styles.followText,
+                    estadoRelacion === "aceptada" ? styles.whiteText : styles.blueText
+                  ]}
+                >
+                  {estadoRelacion === "pendiente"
+                    ? "Pendiente"
+                    : estadoRelacion === "aceptada"
+                    ? "Siguiendo"
+                    : "Seguir"}
+                </Text>
+              )}
+            </TouchableOpacity>
 
-      </View>
+          </View>
 
-      <View style={styles.sectionTitleBox}>
-        <Text style={styles.sectionTitle}>Viajes compartidos</Text>
-      </View>
-
-      {viajes.length === 0 ? (
-        <Text style={styles.noTrips}>Este usuario aún no ha compartido viajes.</Text>
-      ) : (
-        viajes.map((viaje) => (
-          <TouchableOpacity
-            key={viaje.id}
-            style={styles.tripCard}
-            onPress={() => navigation.navigate("DetalleCompartido", { id: viaje.id })}
-          >
-            <Image source={{ uri: viaje.viaje.imagen_destacada }} style={styles.tripImage} />
-            <Text style={styles.tripName}>{viaje.viaje.nombre}</Text>
-            <Text numberOfLines={2} style={styles.tripComment}>{viaje.comentario}</Text>
-          </TouchableOpacity>
-        ))
+          <View style={styles.sectionTitleBox}>
+            <Text style={styles.sectionTitle}>Viajes compartidos</Text>
+          </View>
+        </>
+      }
+      ListEmptyComponent={<Text style={styles.noTrips}>Este usuario aún no ha compartido viajes.</Text>}
+      renderItem={({ item: viaje }) => (
+        <TouchableOpacity
+          style={styles.tripCard}
+          onPress={() => navigation.navigate("DetalleCompartido", { id: viaje.id })}
+        >
+          <Image source={{ uri: viaje.viaje.imagen_destacada }} style={styles.tripImage} />
+          <Text style={styles.tripName}>{viaje.viaje.nombre}</Text>
+          <Text numberOfLines={2} style={styles.tripComment}>{viaje.comentario}</Text>
+        </TouchableOpacity>
       )}
-    </ScrollView>
+    />
   )
 }
 
@@ -53,7 +53,7 @@ const PantallaPrincipal: React.FC<PropsPantallaPrincipal> = ({ navigation }) =>
     setCargando(true)
     try {
       const token = await AsyncStorage.getItem("access_token")
-      const respuesta = await api.get("mis_viajes/", {
+      const respuesta = await api.get("mis_viajes/?fields=id,nombre,ciudad,fecha_inicio,fecha_fin,imagen_destacada&expand=actividades", {
         headers: { Authorization: `Bearer ${token}` },
       })
       setViajes(respuesta.data)
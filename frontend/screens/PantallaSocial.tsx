@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react"
+import React, { useEffect, useRef, useState } from "react"
 import {
   View,
   Text,
@@ -16,20 +16,32 @@ import {
 import AsyncStorage from "@react-native-async-storage/async-storage"
 import { Ionicons } from "@expo/vector-icons"
 import api from "../services/api"
+import { cursorSiguiente, obtenerPagina } from "../services/paginacion"
 import { useNavigation } from "@react-navigation/native"
 
 const { width } = Dimensions.get("window")
 const logo = require("../assets/imagenes/logo.png")
 const avatarDefault = require("../assets/imagenes/user.png")
 
+type Feed = "seguidos" | "populares" | "recientes"
+
+const RUTAS_FEED: Record<Feed, string> = {
+  seguidos: "viaje_compartido/siguiendo/",
+  populares: "viaje_compartido/populares/",
+  recientes: "viaje_compartido/recientes/",
+}
+
 const PantallaSocial = () => {
   const navigation = useNavigation()
-  const [viajesSeguidos, setViajesSeguidos] = useState([])
-  const [viajesPopulares, setViajesPopulares] = useState([])
-  const [viajesRecientes, setViajesRecientes] = useState([])
+  const [viajesSeguidos, setViajesSeguidos] = useState<any[]>([])
+  const [viajesPopulares, setViajesPopulares] = useState<any[]>([])
+  const [viajesRecientes, setViajesRecientes] = useState<any[]>([])
   const [fotoUsuario, setFotoUsuario] = useState<string | null>(null)
   const [cargando, setCargando] = useState(true)
   const [autores, setAutores] = useState<any>({})
+  // Cursor de la siguiente página de cada feed (null si no hay más)
+  const [cursores, setCursores] = useState<Record<Feed, string | null>>({ seguidos: null, populares: null, recientes: null })
+  const cargandoMas = useRef<Record<Feed, boolean>>({ seguidos: false, populares: false, recientes: false })
 
   const [busqueda, setBusqueda] = useState("")
   const [resultados, setResultados] = useState<any[]>([])
@@ -52,7 +64,7 @@ const PantallaSocial = () => {
       }
     }
 
-    setAutores(nuevosAutores)
+    setAutores((anteriores) => ({ ...anteriores, ...nuevosAutores }))
   }
 
   const obtenerViajes = async () => {
@@ -60,15 +72,20 @@ const PantallaSocial = () => {
       const token = await AsyncStorage.getItem("access_token")
       const headers = { Authorization: `Bearer ${token}` }
       const [seguidos, populares, recientes] = await Promise.all([
-        api.get("viaje_compartido/siguiendo/", { headers }),
-        api.get("viaje_compartido/populares/", { headers }),
-        api.get("viaje_compartido/recientes/", { headers }),
+        api.get(RUTAS_FEED.seguidos, { headers }),
+        api.get(RUTAS_FEED.populares, { headers }),
+        api.get(RUTAS_FEED.recientes, { headers }),
       ])
-      setViajesSeguidos(seguidos.data)
-      setViajesPopulares(populares.data)
-      setViajesRecientes(recientes.data)
+      setViajesSeguidos(seguidos.data.results)
+      setViajesPopulares(populares.data.results)
+      setViajesRecientes(recientes.data.results)
+      setCursores({
+        seguidos: cursorSiguiente(seguidos.data.next),
+        populares: cursorSiguiente(populares.data.next),
+        recientes: cursorSiguiente(recientes.data.next),
+      })
 
-      await obtenerAutores([...seguidos.data, ...populares.data, ...recientes.data])
+      await obtenerAutores([...seguidos.data.results, ...populares.data.results, ...recientes.data.results])
     } catch (error) {
       console.error("Error al obtener viajes compartidos:", error)
     } finally {
@@ -76,6 +93,36 @@ const PantallaSocial = () => {
     }
   }
 
+  const cargarMas = async (feed: Feed) => {
+    const cursor = cursores[feed]
+    if (!cursor || cargandoMas.current[feed]) return
+    cargandoMas.current[feed] = true
+    try {
+      const pagina = await obtenerPagina(RUTAS_FEED[feed], cursor)
+      const setViajes = { seguidos: setViajesSeguidos, populares: setViajesPopulares, recientes: setViajesRecientes }[feed]
+      setViajes((anteriores) => [...anteriores, ...pagina.resultados])
+      setCursores((anteriores) => ({ ...anteriores, [feed]: pagina.cursor }))
+      await obtenerAutores(pagina.resultados)
+    } catch (error) {
+      console.error("Error al cargar más viajes:", error)
+    } finally {
+      cargandoMas.current[feed] = false
+    }
+  }
+
+  const renderFeed = (feed: Feed, viajes: any[]) => (
+    <FlatList
+      horizontal
+      data={viajes}
+      keyExtractor={(viaje) => viaje.id.toString()}
+      renderItem={({ item }) => renderViaje(item)}
+      onEndReached={() => cargarMas(feed)}
+      onEndReachedThreshold={0.5}
+      showsHorizontalScrollIndicator={false}
+      style={styles.scrollRow}
+    />
+  )
+
   const verPantallaPerfilUsuario = async (userId: number) => {
     try {
       const token = await AsyncStorage.getItem("access_token")
@@ -239,19 +286,13 @@ const cargarPerfil = async () => {
       ) : (
         <ScrollView showsVerticalScrollIndicator={false}>
           <Text style={styles.sectionTitle}>Viajes de amigos:</Text>
-          <ScrollView horizontal showsHorizontalScrollIndicator={false} style={styles.scrollRow}>
-            {viajesSeguidos.map(renderViaje)}
-          </ScrollView>
+          {renderFeed("seguidos", viajesSeguidos)}
 
           <Text style={styles.sectionTitle}>Viajes populares:</Text>
-          <ScrollView horizontal showsHorizontalScrollIndicator={false} style={styles.scrollRow}>
-            {viajesPopulares.map(renderViaje)}
-          </ScrollView>
+          {renderFeed("populares", viajesPopulares)}
 
           <Text style={styles.sectionTitle}>Viajes recientes:</Text>
-          <ScrollView horizontal showsHorizontalScrollIndicator={false} style={styles.scrollRow}>
-            {viajesRecientes.map(renderViaje)}
-          </ScrollView>
+          {renderFeed("recientes", viajesRecientes)}
         </ScrollView>
       )}
     </View>
@@ -0,0 +1,15 @@
+import api from "./api";
+
+// Los listados paginados por cursor devuelven { next, results }, con next = URL completa de la
+// página siguiente (o null). Se saca el cursor de ahí y se pide con la misma ruta relativa.
+export const cursorSiguiente = (next: string | null): string | null => {
+  if (!next) return null;
+  const coincidencia = next.match(/[?&]cursor=([^&]+)/);
+  return coincidencia ? decodeURIComponent(coincidencia[1]) : null;
+};
+
+export const obtenerPagina = async (ruta: string, cursor: string | null = null, config: any = {}) => {
+  const params = cursor ? { ...(config.params || {}), cursor } : config.params;
+  const res = await api.get(ruta, { ...config, params });
+  return { resultados: res.data.results, cursor: cursorSiguiente(res.data.next) };
+};